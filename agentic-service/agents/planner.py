@@ -2,11 +2,13 @@
 Multi-agent itinerary planner orchestrated via LangGraph.
 Combines OpenAI GPT-4.1-mini, Ollama, FAISS retrieval, and external tools.
 """
+import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Any, AsyncIterator, Awaitable, Dict, List
 from datetime import datetime
 import uuid
 
+import orjson
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
@@ -32,30 +34,28 @@ class AgenticPlanner:
         )
         self.tools = get_available_tools()
         self.tool_executor = ToolExecutor(self.tools)
+        self.agent_slots = asyncio.Semaphore(settings.max_parallel_agents)
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
         """
         Build LangGraph state machine:
         START -> Supervisor -> [Researcher, Logistics, Compliance, Experience] -> Decision -> END
+
+        The four specialist agents are independent, so they fan out from a single
+        run_all_parallel node instead of being chained edge by edge.
         """
         workflow = StateGraph(PlannerState)
         
         # Add nodes
         workflow.add_node("supervisor", self._supervisor_node)
-        workflow.add_node("researcher", self._researcher_node)
-        workflow.add_node("logistics", self._logistics_node)
-        workflow.add_node("compliance", self._compliance_node)
-        workflow.add_node("experience", self._experience_node)
+        workflow.add_node("run_all_parallel", self._run_all_parallel)
         workflow.add_node("decision", self._decision_node)
         
         # Define edges
         workflow.set_entry_point("supervisor")
-        workflow.add_edge("supervisor", "researcher")
-        workflow.add_edge("researcher", "logistics")
-        workflow.add_edge("logistics", "compliance")
-        workflow.add_edge("compliance", "experience")
-        workflow.add_edge("experience", "decision")
+        workflow.add_edge("supervisor", "run_all_parallel")
+        workflow.add_edge("run_all_parallel", "decision")
         workflow.add_edge("decision", END)
         
         return workflow.compile()
@@ -116,123 +116,177 @@ class AgenticPlanner:
                 "error": str(e)
             }
     
-    async def _supervisor_node(self, state: PlannerState) -> PlannerState:
+    async def generate_itinerary_stream(self, **kwargs: Any) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of generate_itinerary. The graph only produces a
+        tour once the decision node runs, so this yields a single result event.
+        """
+        yield {"type": "result", "result": await self.generate_itinerary(**kwargs)}
+    
+    async def refine_itinerary_stream(
+        self,
+        current_itinerary: Dict[str, Any],
+        refinement: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a refinement of an existing itinerary as token events, followed by
+        a result event carrying the refined tour (the original tour if the
+        completion cannot be parsed).
+        """
+        messages = [
+            SystemMessage(content=(
+                "You are a travel planning assistant. You receive an existing itinerary "
+                "and a refinement request. Update the itinerary according to the request while "
+                "preserving its overall structure and quality. Return the updated itinerary "
+                "as a JSON object in the same format."
+            )),
+            HumanMessage(content=(
+                f"Current Itinerary:\n{orjson.dumps(current_itinerary).decode()}\n\n"
+                f"Refinement Request: {refinement}"
+            )),
+        ]
+        llm = self.openai_llm.bind(response_format={"type": "json_object"})
+        
+        parts: List[str] = []
+        async for chunk in llm.astream(messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield {"type": "token", "content": chunk.content}
+        
+        try:
+            refined_tour = orjson.loads("".join(parts))
+        except orjson.JSONDecodeError:
+            logger.warning("Refinement completion was not valid JSON, keeping the original tour")
+            refined_tour = current_itinerary
+        yield {"type": "result", "tour": refined_tour}
+    
+    async def _supervisor_node(self, state: PlannerState) -> Dict[str, Any]:
         """
         Supervisor: coordinates agent execution order and halting conditions.
         """
         logger.info(f"[{state['run_id']}] Supervisor: initiating planning workflow")
         
-        prompt = f"""You are a travel planning supervisor coordinating specialist agents.
-
-Request: {state['days']}-day trip to {state['city']}, {state['country']}
-Budget: {state.get('budget', 'flexible')}
-Preferences: {state.get('preferences', {})}
-
-Coordinate the following agents in sequence:
-1. Researcher - gather destination insights
-2. Logistics - optimize routes/schedules
-3. Compliance - verify safety/visa requirements
-4. Experience - generate media and narrative
-
-Ensure all agents complete successfully before finalizing the itinerary."""
+        # No LLM call here: the supervisor's output never influenced state, and the
+        # specialist agents are dispatched by the run_all_parallel node.
+        logger.info(f"[{state['run_id']}] Supervisor: workflow initialized")
+        return {"status": "in_progress"}
+    
+    async def _run_all_parallel(self, state: PlannerState) -> Dict[str, Any]:
+        """
+        Fan out to the specialist agents concurrently and fan their results back in.
+        Agents return partial updates for disjoint keys, which the PlannerState
+        reducers merge, so no branch needs its own copy of the state.
+        """
+        logger.info(f"[{state['run_id']}] Dispatching specialist agents in parallel")
         
-        response = await self.openai_llm.ainvoke([
-            SystemMessage(content="You are a supervisor coordinating travel planning agents."),
-            HumanMessage(content=prompt)
-        ])
+        research, logistics, compliance, experience = await asyncio.wait_for(
+            asyncio.gather(
+                self._bounded(self._researcher_node(state)),
+                self._bounded(self._logistics_node(state)),
+                self._bounded(self._compliance_node(state)),
+                self._bounded(self._experience_node(state)),
+            ),
+            timeout=settings.agent_timeout_seconds,
+        )
         
-        logger.info(f"[{state['run_id']}] Supervisor: workflow initialized")
-        return state
+        return {**research, **logistics, **compliance, **experience}
     
-    async def _researcher_node(self, state: PlannerState) -> PlannerState:
+    async def _bounded(self, agent: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one specialist agent under the shared concurrency cap."""
+        async with self.agent_slots:
+            return await agent
+    
+    async def _researcher_node(self, state: PlannerState) -> Dict[str, Any]:
         """
         Researcher agent: queries RAG + external APIs for destination data.
         """
         logger.info(f"[{state['run_id']}] Researcher: gathering destination insights")
         
         # TODO: Call FAISS retrieval tool, external APIs
-        state["research_results"] = {
-            "attractions": ["Sample Attraction 1", "Sample Attraction 2"],
-            "weather": "Sunny, 25°C average",
-            "local_tips": "Best season to visit"
+        return {
+            "research_results": {
+                "attractions": ["Sample Attraction 1", "Sample Attraction 2"],
+                "weather": "Sunny, 25°C average",
+                "local_tips": "Best season to visit"
+            },
+            "citations": ["Research database"],
         }
-        state["citations"].append("Research database")
-        
-        return state
     
-    async def _logistics_node(self, state: PlannerState) -> PlannerState:
+    async def _logistics_node(self, state: PlannerState) -> Dict[str, Any]:
         """
         Logistics agent: schedules stops, optimizes routes.
         """
         logger.info(f"[{state['run_id']}] Logistics: optimizing itinerary")
         
         # TODO: OR-Tools route optimization
-        state["logistics_plan"] = {
-            "daily_schedule": [
-                {"day": 1, "stops": ["Stop A", "Stop B", "Stop C"]},
-                {"day": 2, "stops": ["Stop D", "Stop E"]},
-            ],
-            "transport": "mix of walking and public transit"
+        return {
+            "logistics_plan": {
+                "daily_schedule": [
+                    {"day": 1, "stops": ["Stop A", "Stop B", "Stop C"]},
+                    {"day": 2, "stops": ["Stop D", "Stop E"]},
+                ],
+                "transport": "mix of walking and public transit"
+            }
         }
-        
-        return state
     
-    async def _compliance_node(self, state: PlannerState) -> PlannerState:
+    async def _compliance_node(self, state: PlannerState) -> Dict[str, Any]:
         """
         Compliance agent: checks visa, safety advisories, vaccinations.
         """
         logger.info(f"[{state['run_id']}] Compliance: validating requirements")
         
         # TODO: Call safety/visa APIs
-        state["compliance_checks"] = {
-            "visa_required": False,
-            "safety_level": "safe",
-            "vaccinations": []
+        return {
+            "compliance_checks": {
+                "visa_required": False,
+                "safety_level": "safe",
+                "vaccinations": []
+            }
         }
-        
-        return state
     
-    async def _experience_node(self, state: PlannerState) -> PlannerState:
+    async def _experience_node(self, state: PlannerState) -> Dict[str, Any]:
         """
         Experience agent: generates images, narrative copy.
         """
         logger.info(f"[{state['run_id']}] Experience: creating content")
         
         # TODO: DALL-E image generation
-        state["experience_content"] = {
-            "hero_image": "https://placeholder.com/600x400",
-            "description": f"An unforgettable {state['days']}-day journey through {state['city']}"
+        return {
+            "experience_content": {
+                "hero_image": "https://placeholder.com/600x400",
+                "description": f"An unforgettable {state['days']}-day journey through {state['city']}"
+            }
         }
-        
-        return state
     
-    async def _decision_node(self, state: PlannerState) -> PlannerState:
+    async def _decision_node(self, state: PlannerState) -> Dict[str, Any]:
         """
         Decision node: reconciles all agent outputs into final itinerary.
         """
         logger.info(f"[{state['run_id']}] Decision: assembling final itinerary")
         
-        state["final_tour"] = {
+        stops: List[str] = []
+        for day in state["logistics_plan"].get("daily_schedule", ()):
+            stops.extend(day.get("stops", ()))
+        
+        final_tour = {
             "city": state["city"],
             "country": state["country"],
             "title": f"{state['days']}-Day {state['city']} Adventure",
             "description": state["experience_content"].get("description", ""),
             "image": state["experience_content"].get("hero_image"),
-            "stops": [
-                stop for day in state["logistics_plan"].get("daily_schedule", [])
-                for stop in day.get("stops", [])
-            ],
+            "stops": stops,
             "compliance": state["compliance_checks"],
             "research": state["research_results"]
         }
         
-        state["cost"] = {
-            "llm_tokens": 1500,
-            "api_calls": 5,
-            "total_usd": 0.15
-        }
-        
-        state["status"] = "completed"
         logger.info(f"[{state['run_id']}] Planning completed successfully")
         
-        return state
+        return {
+            "final_tour": final_tour,
+            "cost": {
+                "llm_tokens": 1500,
+                "api_calls": 5,
+                "total_usd": 0.15
+            },
+            "status": "completed",
+        }
@@ -2,13 +2,22 @@
 Simplified travel planner without LangGraph dependencies.
 Uses direct OpenAI calls for itinerary generation + Amadeus for real travel data.
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Any, List, Optional, Set, Tuple
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import chain
 import uuid
-import json
 
+import faiss
+import httpx
+import numpy as np
 import openai
+import orjson
+from partial_json_parser import Allow, loads as parse_partial_json
 
 from config import settings
 from services.amadeus_service import amadeus_service
@@ -16,91 +25,54 @@ from services.amadeus_service import amadeus_service
 logger = logging.getLogger(__name__)
 
 
-class SimplePlanner:
-    """
-    Simplified travel planner using direct LLM calls.
-    """
-    
-    def __init__(self):
-        self.openai_client = openai.AsyncOpenAI(
-            api_key=settings.openai_api_key
-        )
-    
-    async def generate_itinerary(
-        self,
-        city: str,
-        country: str,
-        days: int,
-        budget: Optional[float] = None,
-        preferences: Dict[str, Any] = None,
-        user_id: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """
-        Generate a travel itinerary using a single LLM call.
-        """
-        run_id = str(uuid.uuid4())
-        logger.info(f"[{run_id}] Generating itinerary for {days}-day trip to {city}, {country}")
-        
-        # Get real travel data from Amadeus if available
-        flight_data = None
-        hotel_data = None
-        
-        if amadeus_service.is_available():
-            try:
-                # Get airport codes
-                origin_code = "LAX"  # Default, could be user's location
-                dest_code = amadeus_service.get_airport_code(city)
-                
-                if dest_code:
-                    # Search for flights
-                    departure_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-                    return_date = (datetime.now() + timedelta(days=30+days)).strftime('%Y-%m-%d')
-                    
-                    logger.info(f"[{run_id}] Fetching real flight data...")
-                    flight_data = amadeus_service.search_flights(
-                        origin=origin_code,
-                        destination=dest_code,
-                        departure_date=departure_date,
-                        return_date=return_date,
-                        adults=1,
-                        max_results=3
-                    )
-                
-                # Search for hotels
-                # Get city code (first 3 letters uppercase)
-                city_code = city[:3].upper()
-                logger.info(f"[{run_id}] Fetching real hotel data...")
-                hotel_data = amadeus_service.search_hotels(
-                    city_code=city_code,
-                    max_results=5
-                )
-            except Exception as e:
-                logger.warning(f"[{run_id}] Could not fetch Amadeus data: {e}")
-        
-        try:
-            # Build preferences string
-            pref_list = [k for k, v in (preferences or {}).items() if v]
-            pref_str = ", ".join(pref_list) if pref_list else "balanced mix of activities"
-            
-            # Build budget string
-            budget_str = f"${budget:.2f}" if budget else "flexible budget"
-            
-            # Build real travel data context
-            travel_data_context = ""
-            if flight_data and flight_data.get("flights"):
-                cheapest_flight = min(flight_data["flights"], key=lambda x: float(x["price"]["total"]))
-                travel_data_context += f"\n\nReal Flight Data Available:"
-                travel_data_context += f"\n- Cheapest flight: {cheapest_flight['price']['currency']} {cheapest_flight['price']['total']}"
-                travel_data_context += f"\n- {len(flight_data['flights'])} flight options found"
-            
-            if hotel_data and hotel_data.get("hotels"):
-                travel_data_context += f"\n\nReal Hotel Data Available:"
-                travel_data_context += f"\n- {len(hotel_data['hotels'])} hotels found"
-                for hotel in hotel_data["hotels"][:3]:
-                    travel_data_context += f"\n  • {hotel['name']}"
-            
-            # Create the prompt
-            system_prompt = """You are an expert travel planner AI. Generate detailed, realistic travel itineraries.
+# Airport codes are static per city; the lookup is an in-memory dict, so it runs inline
+@lru_cache(maxsize=4096)
+def _airport_code(city: str) -> Optional[str]:
+    return amadeus_service.get_airport_code(city)
+
+
+# Shared across planner instances so every request reuses one warm connection pool
+_openai_client = openai.AsyncOpenAI(
+    api_key=settings.openai_api_key,
+    max_retries=2,
+    timeout=60.0,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    ),
+)
+
+# Semantic itinerary cache: near-duplicate requests reuse a previous tour
+CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+CACHE_EMBEDDING_DIMENSION = 1536
+CACHE_SIMILARITY_THRESHOLD = 0.97
+CACHE_MAX_ENTRIES = 1024
+# Entries for one city sit almost on top of each other, so several nearest
+# neighbours are checked against the exact-match fields
+CACHE_SEARCH_CANDIDATES = 16
+
+# Exact-match cache on the normalized request, checked before any embedding call
+EXACT_CACHE_MAX_ENTRIES = 1024
+BUDGET_BUCKET_SIZE = 50
+
+# Completion budget scales with trip length; gpt-4o-mini caps output at 16k tokens
+OUTPUT_TOKENS_BASE = 600
+OUTPUT_TOKENS_PER_DAY = 500
+MAX_OUTPUT_TOKENS = 16000
+
+# Hotel inventory changes slowly; reuse Amadeus hotel listings for an hour
+HOTEL_CACHE_TTL_SECONDS = 3600
+# Cached itineraries carry the flight and hotel offers they were built with,
+# so they must not outlive the hotel listings
+RESULT_CACHE_TTL_SECONDS = HOTEL_CACHE_TTL_SECONDS
+
+REFINE_SYSTEM_PROMPT = """You are a travel planning assistant. You receive an existing itinerary
+and a refinement request. Your job is to update the itinerary according to the request while
+preserving the overall structure and quality. Return the updated itinerary as a JSON object
+in the same format."""
+
+# Static prompts are module constants so the system prefix is byte-identical
+# across requests, which lets OpenAI's automatic prompt caching apply.
+SYSTEM_PROMPT = """You are an expert travel planner AI. Generate detailed, realistic travel itineraries.
 
 CRITICAL REQUIREMENTS FOR LOCATIONS:
 - Every location MUST be a specific place name (museum, restaurant, store, park, building)
@@ -164,8 +136,8 @@ Return your response as a structured JSON object with this format:
     "total": 0
   }
 }"""
-            
-            user_prompt = f"""Plan a {days}-day trip to {city}, {country}.
+
+USER_PROMPT_TEMPLATE = """Plan a {days}-day trip to {city}, {country}.
 
 Travel Preferences: {pref_str}
 Budget: {budget_str}{travel_data_context}
@@ -197,35 +169,241 @@ IMPORTANT:
    - Make sure every time slot is filled with something meaningful
 
 Return the itinerary as JSON following the specified format."""
+
+
+class SimplePlanner:
+    """
+    Simplified travel planner using direct LLM calls.
+    """
+    
+    def __init__(self):
+        self.openai_client = _openai_client
+        # Inner-product index over normalized request embeddings (cosine similarity),
+        # with cached results stored at the matching row position.
+        self._cache_index = faiss.IndexFlatIP(CACHE_EMBEDDING_DIMENSION)
+        self._cached_results: List[Dict[str, Any]] = []
+        # Match fields present in the semantic cache; without one, a lookup cannot hit
+        self._cached_match_fields: Set[Tuple[Any, ...]] = set()
+        # Both result caches store (cached_at, result) and expire after RESULT_CACHE_TTL_SECONDS
+        self._exact_cache: OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]] = OrderedDict()
+        # Hotel listings expire after a TTL
+        self._hotel_cache: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+    
+    async def generate_itinerary(
+        self,
+        city: str,
+        country: str,
+        days: int,
+        budget: Optional[float] = None,
+        preferences: Dict[str, Any] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a travel itinerary using a single LLM call.
+        Consumes generate_itinerary_stream and returns only the final result.
+        """
+        result: Dict[str, Any] = {}
+        async for event in self.generate_itinerary_stream(
+            city=city,
+            country=country,
+            days=days,
+            budget=budget,
+            preferences=preferences,
+            user_id=user_id
+        ):
+            if event["type"] == "result":
+                result = event["result"]
+        return result
+    
+    async def generate_itinerary_stream(
+        self,
+        city: str,
+        country: str,
+        days: int,
+        budget: Optional[float] = None,
+        preferences: Dict[str, Any] = None,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a travel itinerary, yielding progress while the model writes it.
+        
+        Yields {"type": "partial", "tour": {...}} each time another JSON object or
+        array in the completion closes, then one {"type": "result", "result": {...}}
+        carrying the same payload generate_itinerary returns. If a truncated
+        completion is retried, {"type": "reset"} comes first: partials sent before
+        it belong to the abandoned attempt and should be discarded.
+        """
+        run_id = str(uuid.uuid4())
+        logger.info(f"[{run_id}] Generating itinerary for {days}-day trip to {city}, {country}")
+        
+        exact_key = self._exact_cache_key(city, country, days, budget, preferences)
+        cached = self._exact_cache.get(exact_key)
+        if cached is not None and time.monotonic() - cached[0] < RESULT_CACHE_TTL_SECONDS:
+            self._exact_cache.move_to_end(exact_key)
+            logger.info(f"[{run_id}] Serving itinerary from exact-match cache")
+            yield {"type": "result", "result": {**cached[1], "run_id": run_id}}
+            return
+        
+        # Skip the embeddings round trip unless some cached entry could match
+        cache_embedding = None
+        if self._semantic_match_fields(exact_key) in self._cached_match_fields:
+            cache_embedding = await self._embed_request(city, country)
+            cached = self._lookup_cached_itinerary(cache_embedding, exact_key)
+            if cached is not None:
+                logger.info(f"[{run_id}] Serving itinerary from semantic cache")
+                yield {"type": "result", "result": {**cached, "run_id": run_id}}
+                return
+        
+        # Get real travel data from Amadeus if available.
+        # Flights and hotels are fetched concurrently while the prompt inputs
+        # are prepared.
+        flight_data = None
+        hotel_data = None
+        flight_task = None
+        hotel_task = None
+        
+        if amadeus_service.is_available():
+            try:
+                # Get airport codes
+                origin_code = "LAX"  # Default, could be user's location
+                dest_code = _airport_code(city.strip().lower())
+                
+                if dest_code:
+                    # Search for flights
+                    today = date.today()
+                    departure_date = (today + timedelta(days=30)).isoformat()
+                    return_date = (today + timedelta(days=30+days)).isoformat()
+                    
+                    logger.info(f"[{run_id}] Fetching real flight data...")
+                    flight_task = asyncio.create_task(amadeus_service.search_flights(
+                        origin=origin_code,
+                        destination=dest_code,
+                        departure_date=departure_date,
+                        return_date=return_date,
+                        adults=1,
+                        max_results=3
+                    ))
+                
+                # Search for hotels
+                # Get city code (first 3 letters uppercase)
+                city_code = city[:3].upper()
+                hotel_key = (city_code, 5)
+                cached_hotels = self._hotel_cache.get(hotel_key)
+                if cached_hotels and time.monotonic() - cached_hotels[0] < HOTEL_CACHE_TTL_SECONDS:
+                    hotel_data = cached_hotels[1]
+                else:
+                    logger.info(f"[{run_id}] Fetching real hotel data...")
+                    hotel_task = asyncio.create_task(amadeus_service.search_hotels(
+                        city_code=city_code,
+                        max_results=5
+                    ))
+            except Exception as e:
+                logger.warning(f"[{run_id}] Could not fetch Amadeus data: {e}")
+        
+        try:
+            # Build preferences string
+            pref_list = [k for k, v in (preferences or {}).items() if v]
+            pref_str = ", ".join(pref_list) if pref_list else "balanced mix of activities"
+            
+            # Build budget string
+            budget_str = f"${budget:.2f}" if budget else "flexible budget"
+            
+            # Collect Amadeus results; a failed leg is dropped without losing the other
+            pending = [task for task in (flight_task, hotel_task) if task is not None]
+            if pending:
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                for task, outcome in zip(pending, results):
+                    if isinstance(outcome, Exception):
+                        logger.warning(f"[{run_id}] Could not fetch Amadeus data: {outcome}")
+                    elif task is flight_task:
+                        flight_data = outcome
+                    else:
+                        hotel_data = outcome
+                        if not outcome.get("error"):
+                            self._hotel_cache[hotel_key] = (time.monotonic(), outcome)
+            
+            # Build real travel data context
+            context_parts: List[str] = []
+            if flight_data and flight_data.get("flights"):
+                cheapest_flight = min(flight_data["flights"], key=lambda x: float(x.price.total))
+                context_parts.append("\n\nReal Flight Data Available:")
+                context_parts.append(f"\n- Cheapest flight: {cheapest_flight.price.currency} {cheapest_flight.price.total}")
+                context_parts.append(f"\n- {len(flight_data['flights'])} flight options found")
+            
+            if hotel_data and hotel_data.get("hotels"):
+                context_parts.append("\n\nReal Hotel Data Available:")
+                context_parts.append(f"\n- {len(hotel_data['hotels'])} hotels found")
+                for hotel in hotel_data["hotels"][:3]:
+                    context_parts.append(f"\n  • {hotel['name']}")
+            travel_data_context = "".join(context_parts)
             
-            # Call the OpenAI API directly
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
+            user_prompt = USER_PROMPT_TEMPLATE.format(
+                days=days,
+                city=city,
+                country=country,
+                pref_str=pref_str,
+                budget_str=budget_str,
+                travel_data_context=travel_data_context
             )
             
-            # Parse the response
-            content = response.choices[0].message.content.strip()
+            # Size the output budget to the trip length. JSON mode ends the completion
+            # when the object closes, so a tight ceiling only bites on truncation,
+            # in which case the request is retried once with double the budget.
+            max_tokens = min(MAX_OUTPUT_TOKENS, OUTPUT_TOKENS_BASE + days * OUTPUT_TOKENS_PER_DAY)
+            for attempt in range(2):
+                # Stream the completion so the tour can be surfaced as it is written
+                stream = await self.openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    response_format={"type": "json_object"},
+                    stream=True
+                )
+                
+                parts: List[str] = []
+                last_partial: Optional[Dict[str, Any]] = None
+                finish_reason: Optional[str] = None
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        if choice.finish_reason:
+                            finish_reason = choice.finish_reason
+                        delta = choice.delta.content
+                        if not delta:
+                            continue
+                        parts.append(delta)
+                        
+                        # Only re-parse when a value has closed; mid-string tokens add nothing
+                        if "}" in delta or "]" in delta:
+                            partial = self._parse_partial_tour("".join(parts), city, country)
+                            if partial and partial != last_partial:
+                                last_partial = partial
+                                yield {"type": "partial", "tour": partial}
+                finally:
+                    await stream.response.aclose()
+                
+                if finish_reason != "length" or attempt or max_tokens >= MAX_OUTPUT_TOKENS:
+                    break
+                logger.warning(f"[{run_id}] Completion truncated at {max_tokens} tokens, retrying")
+                max_tokens = min(MAX_OUTPUT_TOKENS, max_tokens * 2)
+                if last_partial is not None:
+                    yield {"type": "reset"}
             
-            # Try to extract JSON from the response
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            elif "```" in content:
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
+            # JSON mode guarantees a bare JSON object, so no markdown fences to strip
+            content = "".join(parts)
             
+            parsed = True
             try:
-                itinerary_data = json.loads(content)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, create a structured response
+                itinerary_data = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                parsed = False
+                # Only reachable if the completion was truncated; keep a structured response
                 itinerary_data = {
                     "title": f"{days}-Day {city} Adventure",
                     "description": content[:500],
@@ -248,23 +426,23 @@ Return the itinerary as JSON following the specified format."""
                 # Use the curated top 10 places list
                 stops = itinerary_data["top_10_places"][:10]
             else:
-                # Fallback: collect unique stops from activities
+                # Fallback: unique stops from activities, topped up with highlights,
+                # deduplicated case-insensitively in one ordered pass
+                activity_locations = (
+                    activity.get("location", activity.get("activity", "Activity"))
+                    for day in itinerary_data.get("daily_schedule", [])
+                    for activity in day.get("activities", [])
+                )
                 seen_locations = set()
-                for day in itinerary_data.get("daily_schedule", []):
-                    for activity in day.get("activities", []):
-                        location = activity.get("location", activity.get("activity", "Activity"))
-                        if location and location.lower() not in seen_locations:
-                            stops.append(location)
-                            seen_locations.add(location.lower())
-                
-                # Add highlights if we don't have enough
-                if len(stops) < 10:
-                    for highlight in itinerary_data.get("highlights", [])[:10]:
-                        if highlight and highlight.lower() not in seen_locations:
-                            stops.append(highlight)
-                            seen_locations.add(highlight.lower())
-                            if len(stops) >= 10:
-                                break
+                for location in chain(activity_locations, itinerary_data.get("highlights", [])[:10]):
+                    if not location:
+                        continue
+                    key = location.lower()
+                    if key not in seen_locations:
+                        seen_locations.add(key)
+                        stops.append(location)
+                        if len(stops) >= 10:
+                            break
             
             tour = {
                 "city": city,
@@ -300,17 +478,204 @@ Return the itinerary as JSON following the specified format."""
                 "status": "completed"
             }
             
+            if parsed:
+                self._exact_cache[exact_key] = (time.monotonic(), result)
+                self._exact_cache.move_to_end(exact_key)
+                if len(self._exact_cache) > EXACT_CACHE_MAX_ENTRIES:
+                    self._exact_cache.popitem(last=False)
+                if cache_embedding is None:
+                    cache_embedding = await self._embed_request(city, country)
+                self._cache_itinerary(cache_embedding, exact_key, result)
+            
             logger.info(f"[{run_id}] Itinerary generated successfully")
-            return result
+            yield {"type": "result", "result": result}
         
         except Exception as exc:
             logger.error(f"[{run_id}] Generation failed: {str(exc)}", exc_info=True)
-            return {
-                "run_id": run_id,
-                "tour": {},
-                "cost": {},
-                "citations": [],
-                "status": "failed",
-                "error": str(exc)
+            yield {
+                "type": "result",
+                "result": {
+                    "run_id": run_id,
+                    "tour": {},
+                    "cost": {},
+                    "citations": [],
+                    "status": "failed",
+                    "error": str(exc)
+                }
             }
+    
+    async def refine_itinerary_stream(
+        self,
+        current_itinerary: Dict[str, Any],
+        refinement: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a refinement of an existing itinerary.
+        Yields {"type": "token"} events as the model writes, then a final
+        {"type": "result"} carrying the refined tour (the original tour if the
+        completion cannot be parsed).
+        """
+        user_prompt = (
+            f"Current Itinerary:\n{orjson.dumps(current_itinerary).decode()}\n\n"
+            f"Refinement Request: {refinement}\n\n"
+            "Please update the itinerary to incorporate this change. "
+            "Return the complete updated itinerary."
+        )
+        stream = await self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": REFINE_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.7,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        
+        parts: List[str] = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    yield {"type": "token", "content": delta}
+        finally:
+            await stream.response.aclose()
+        
+        try:
+            refined_tour = orjson.loads("".join(parts))
+        except orjson.JSONDecodeError:
+            logger.warning("Refinement completion was not valid JSON, keeping the original tour")
+            refined_tour = current_itinerary
+        yield {"type": "result", "tour": refined_tour}
+    
+    @staticmethod
+    def _parse_partial_tour(buffer: str, city: str, country: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse the incomplete completion and project the fields the client can show early.
+        Returns None while nothing displayable has been emitted yet.
+        """
+        try:
+            data = parse_partial_json(buffer, Allow.ALL)
+        except Exception:
+            return None
+        if not isinstance(data, dict):
+            return None
+        
+        partial = {
+            key: data[key]
+            for key in ("title", "description", "daily_plans")
+            if data.get(key)
+        }
+        if not partial:
+            return None
+        return {"city": city, "country": country, **partial}
 
+    
+    @staticmethod
+    def _exact_cache_key(
+        city: str,
+        country: str,
+        days: int,
+        budget: Optional[float],
+        preferences: Optional[Dict[str, Any]],
+    ) -> Tuple[Any, ...]:
+        """
+        Normalize request arguments into a hashable exact-match cache key.
+        Budgets are bucketed and preferences serialized with sorted keys, since
+        preference values may be lists (e.g. {"tags": [...]}).
+        """
+        budget_bucket = round(budget / BUDGET_BUCKET_SIZE) * BUDGET_BUCKET_SIZE if budget else None
+        pref_key = orjson.dumps(preferences or {}, option=orjson.OPT_SORT_KEYS)
+        return (city.strip().lower(), country.strip().lower(), days, budget_bucket, pref_key)
+    
+    async def _embed_request(self, city: str, country: str) -> Optional[np.ndarray]:
+        """
+        Embed the destination for the semantic cache. Days, budget and
+        preferences are left out: values a digit or a flag apart embed almost
+        identically, so they are matched exactly instead.
+        Returns None if the embedding call fails so generation proceeds uncached.
+        """
+        cache_key = f"{city.strip().lower()}, {country.strip().lower()}"
+        try:
+            return await self.embed_texts([cache_key])
+        except Exception as exc:
+            logger.warning(f"Semantic cache embedding failed: {exc}")
+            return None
+    
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed any number of texts with a single embeddings request.
+        Returns an (N, CACHE_EMBEDDING_DIMENSION) float32 matrix of L2-normalized
+        rows in input order. Callers embedding several items (e.g. itinerary
+        stops for dedup or routing) should batch them here, not call per item.
+        """
+        response = await self.openai_client.embeddings.create(
+            model=CACHE_EMBEDDING_MODEL,
+            input=texts
+        )
+        ordered = sorted(response.data, key=lambda item: item.index)
+        embeddings = np.asarray([item.embedding for item in ordered], dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    @staticmethod
+    def _semantic_match_fields(exact_key: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        """Everything in the exact key except the country: city, days, budget bucket, preferences."""
+        city_key, _country_key, *rest = exact_key
+        return (city_key, *rest)
+    
+    def _lookup_cached_itinerary(
+        self,
+        embedding: Optional[np.ndarray],
+        exact_key: Tuple[Any, ...],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached result for a near-duplicate request, if any.
+        City, trip length, budget bucket and preferences must match exactly;
+        similarity only absorbs differences in how the country is written.
+        """
+        if embedding is None or self._cache_index.ntotal == 0:
+            return None
+        
+        match_fields = self._semantic_match_fields(exact_key)
+        scores, indices = self._cache_index.search(
+            embedding, min(CACHE_SEARCH_CANDIDATES, self._cache_index.ntotal)
+        )
+        for score, index in zip(scores[0].tolist(), indices[0].tolist()):
+            if score < CACHE_SIMILARITY_THRESHOLD:
+                break
+            if index < 0:
+                continue
+            entry = self._cached_results[index]
+            if (
+                entry["match"] == match_fields
+                and time.monotonic() - entry["cached_at"] < RESULT_CACHE_TTL_SECONDS
+            ):
+                return entry["result"]
+        return None
+    
+    def _cache_itinerary(
+        self,
+        embedding: Optional[np.ndarray],
+        exact_key: Tuple[Any, ...],
+        result: Dict[str, Any],
+    ) -> None:
+        """Store a generated result in the semantic cache."""
+        if embedding is None:
+            return
+        
+        if self._cache_index.ntotal >= CACHE_MAX_ENTRIES:
+            # Flat index has no eviction; start over once the cache is full.
+            self._cache_index.reset()
+            self._cached_results.clear()
+            self._cached_match_fields.clear()
+        
+        match_fields = self._semantic_match_fields(exact_key)
+        self._cache_index.add(embedding)
+        self._cached_results.append({
+            "match": match_fields,
+            "cached_at": time.monotonic(),
+            "result": result,
+        })
+        self._cached_match_fields.add(match_fields)
@@ -2,20 +2,205 @@
 Simplified travel planner without LangGraph dependencies.
 Uses direct OpenAI calls for itinerary generation + Amadeus for real travel data.
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import math
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Any, Final, List, Optional, Tuple
 from datetime import datetime, timedelta
 import uuid
-import json
 
+import aiohttp
 import openai
+import orjson
+from httpx_aiohttp import AiohttpTransport
 
-from config_lambda import settings
+from config_lambda import OPENAI_API_KEY
 from services.amadeus_service_lambda import amadeus_service
 from services.unsplash_service import unsplash_service
 
 logger = logging.getLogger(__name__)
 
+# Shared across warm Lambda invocations. The aiohttp transport holds up much
+# better than the default httpx pool when several itineraries are generated
+# concurrently, and the keep-alive pool saves a TLS handshake per call.
+# Pool sizing has to go on the aiohttp connector: the transport ignores
+# httpx.Limits. The session is created lazily, inside the running loop.
+_openai_client = openai.AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=openai.DefaultAioHttpClient(
+        transport=AiohttpTransport(
+            client=lambda: aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=32, keepalive_timeout=75),
+            ),
+        ),
+    ),
+)
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Return the OpenAI client shared by every planner in this container."""
+    return _openai_client
+
+
+# Static prompt text is built once; a byte-identical prefix also lets OpenAI
+# reuse its prompt cache across requests.
+_SYSTEM_PROMPT: Final[str] = """You are an expert travel planner AI. Generate detailed, realistic travel itineraries.
+
+LOCATIONS:
+- Every location is a specific, named place (attraction, museum, restaurant, store) with its complete real street address and postal code, never just a neighborhood or district
+- Format: "Place Name, Street Address, District, City Postal-Code"; in Japan use the Chome form, e.g. "Shibuya 109, 2 Chome-29-1 Dogenzaka, Shibuya, Tokyo 150-0043"
+- NEVER repeat the same location anywhere in the itinerary
+
+NOTES (every activity):
+- 2-3 sentences: first what makes the place special, then a practical tip, historical context or insider recommendation
+- Example: "This renowned museum houses the world's largest collection of Japanese art, spanning ancient pottery to contemporary works. Arrive early to avoid crowds and don't miss the samurai armor exhibit on the second floor."
+- NEVER write single short phrases like "Discover Japan's rich history through art"
+
+Return a JSON object with this format:
+{
+  "title": "Trip title",
+  "description": "Brief overview",
+  "daily_plans": [
+    {
+      "day": 1,
+      "date": "Day 1",
+      "theme": "Day theme",
+      "plan": [
+        {"time": "7:00 AM", "activity": "Breakfast", "location": "Cafe Name, Address", "duration": "1 hour", "notes": "Two-sentence note"}
+      ],
+      "total_activities": 5,
+      "estimated_walking": "5 km",
+      "tips": "Wear comfortable shoes"
+    }
+  ],
+  "top_10_places": ["Place Name, City"],
+  "recommended_hotels": [
+    {"name": "Hotel Name", "price_range": "$$-$$$", "rating": 4.5, "address": "Street Address, City", "description": "Key features and why it's recommended"}
+  ],
+  "highlights": ["Specific attraction"],
+  "local_tips": ["Tip"],
+  "compliance": {"visa_required": false, "safety_level": "safe", "vaccinations": []},
+  "estimated_costs": {"accommodation": 0, "food": 0, "activities": 0, "transport": 0, "total": 0}
+}"""
+
+_USER_PROMPT_TEMPLATE: Final[str] = """Plan a {days}-day trip to {city}, {country}.
+
+Travel Preferences: {pref_str}
+Budget: {budget_str}"""
+
+_USER_PROMPT_RULES: Final[str] = """
+
+Requirements:
+1. "top_10_places": EXACTLY 10 unique must-visit places in {city} (landmarks, museums, restaurants, viewpoints, parks), each formatted "Place Name, City"
+2. "recommended_hotels": EXACTLY 3 hotels at different price points (luxury, mid-range, budget) with realistic ratings and descriptions of amenities and location. This field is required.
+3. "daily_plans" for {day_range}: an hour-by-hour schedule from 7:00 AM to 8:00 PM with breakfast (7-8 AM), morning activities (8 AM-12 PM), lunch (12-1:30 PM), afternoon activities (2-6 PM) and dinner (6-8 PM), plus walking distance and tips for the day
+4. Match the preferences, stay around the budget, and include timing, logistics, local insights and safety information"""
+
+# Completion budget grows with trip length up to the model's output cap
+OUTPUT_TOKENS_BASE = 1500
+OUTPUT_TOKENS_PER_DAY = 800
+MAX_OUTPUT_TOKENS = 16000
+# Most days one completion can plan without running into MAX_OUTPUT_TOKENS
+MAX_DAYS_PER_REQUEST = (MAX_OUTPUT_TOKENS - OUTPUT_TOKENS_BASE) // OUTPUT_TOKENS_PER_DAY
+
+# Rough budget for the request prompt. Four characters per token is close
+# enough for English text and avoids shipping a tokenizer in the Lambda.
+MAX_INPUT_TOKENS = 3000
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+def _output_token_budget(days: int) -> int:
+    return min(MAX_OUTPUT_TOKENS, OUTPUT_TOKENS_BASE + OUTPUT_TOKENS_PER_DAY * days)
+
+
+def _day_slices(days: int) -> List[Tuple[int, int]]:
+    """Split the trip into as few near-equal (start, end) day ranges as fit one completion each."""
+    size = math.ceil(days / math.ceil(days / MAX_DAYS_PER_REQUEST))
+    return [(start, min(start + size - 1, days)) for start in range(1, days + 1, size)]
+
+
+def _day_range(start: int, end: int, days: int) -> str:
+    """Which days a request should plan: the whole trip, or one numbered slice of it."""
+    if start == 1 and end == days:
+        return f"EACH of the {days} days"
+    return f"EACH of days {start}-{end} of the {days}-day trip only, numbered from day {start}"
+
+
+def _location_key(item: Dict[str, Any]) -> str:
+    return str(item.get("location") or "").strip().casefold()
+
+
+def _merge_daily_plans(itinerary: Dict[str, Any], extra: Dict[str, Any]) -> None:
+    """
+    Append a later slice of the trip's daily_plans to `itinerary`; daily_schedule
+    is derived from the merged plans afterwards. Slices are written concurrently
+    without seeing each other, so activities at a location already on the
+    itinerary are dropped.
+    """
+    merged = itinerary.setdefault("daily_plans", [])
+    seen = {_location_key(item) for day in merged for item in day.get("plan", [])}
+    for day in extra.get("daily_plans", []):
+        kept = []
+        for item in day.get("plan", []):
+            location = _location_key(item)
+            if location and location in seen:
+                continue
+            seen.add(location)
+            kept.append(item)
+        merged.append({**day, "plan": kept})
+
+
+def _build_user_prompt(required: List[str], optional: str) -> str:
+    """
+    Join the required prompt sections, always kept in full, with as much of
+    the optional section as still fits the input token budget once the system
+    prompt is accounted for.
+    """
+    prompt = "".join(required)
+    budget = MAX_INPUT_TOKENS - _estimate_tokens(_SYSTEM_PROMPT) - _estimate_tokens(prompt)
+    # _estimate_tokens counts four characters per token
+    limit = max(0, budget * 4)
+    if len(optional) <= limit:
+        return prompt + optional
+    # Cut at a line break so no flight or hotel line is left half-written
+    return prompt + optional[:limit].rpartition("\n")[0]
+
+
+# Used when the LLM omits recommended_hotels; {city}/{country} are filled per request
+_FALLBACK_HOTELS: Final = (
+    {
+        "name": "Premium Hotel {city}",
+        "price_range": "$$$$",
+        "rating": 4.5,
+        "address": "Downtown {city}, {country}",
+        "description": "Luxury accommodations in the heart of {city} with premium amenities, rooftop dining, and spa facilities."
+    },
+    {
+        "name": "Comfort Inn {city}",
+        "price_range": "$$",
+        "rating": 4.0,
+        "address": "Central {city}, {country}",
+        "description": "Modern mid-range hotel offering excellent value with comfortable rooms, complimentary breakfast, and convenient location."
+    },
+    {
+        "name": "Budget Stay {city}",
+        "price_range": "$",
+        "rating": 3.5,
+        "address": "{city} City Center, {country}",
+        "description": "Clean and affordable accommodations perfect for budget travelers, with basic amenities and friendly service."
+    },
+)
+
+
+@lru_cache(maxsize=512)
+def _airport_code(city: str) -> Optional[str]:
+    return amadeus_service.get_airport_code(city)
+
 
 class SimplePlanner:
     """
@@ -23,9 +208,7 @@ class SimplePlanner:
     """
     
     def __init__(self):
-        self.openai_client = openai.AsyncOpenAI(
-            api_key=settings.openai_api_key
-        )
+        self.openai_client = get_openai_client()
     
     async def generate_itinerary(
         self,
@@ -40,52 +223,56 @@ class SimplePlanner:
         Generate a travel itinerary using a single LLM call.
         """
         run_id = str(uuid.uuid4())
-        logger.info(f"[{run_id}] Generating itinerary for {days}-day trip to {city}, {country}")
-        
-        # Get real travel data from Amadeus if available
-        flight_data = None
-        hotel_data = None
-        hero_image = None
+        logger.info("[%s] Generating itinerary for %s-day trip to %s, %s", run_id, days, city, country)
         
-        # Fetch hero image from Unsplash (parallel with Amadeus calls)
-        try:
-            hero_image = unsplash_service.get_destination_image(city, country)
-            if hero_image:
-                logger.info(f"[{run_id}] Hero image fetched: {hero_image['photographer']}")
-        except Exception as e:
-            logger.warning(f"[{run_id}] Failed to fetch hero image: {e}")
+        # Fetch the hero image and real travel data concurrently
+        lookups = [unsplash_service.get_destination_image_async(city, country)]
         
+        dest_code = None
         if amadeus_service.is_available():
-            try:
-                # Get airport codes
-                origin_code = "LAX"  # Default, could be user's location
-                dest_code = amadeus_service.get_airport_code(city)
-                
-                if dest_code:
-                    # Search for flights
-                    departure_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-                    return_date = (datetime.now() + timedelta(days=30+days)).strftime('%Y-%m-%d')
-                    
-                    logger.info(f"[{run_id}] Fetching real flight data...")
-                    flight_data = amadeus_service.search_flights(
-                        origin=origin_code,
-                        destination=dest_code,
-                        departure_date=departure_date,
-                        return_date=return_date,
-                        adults=1,
-                        max_results=3
-                    )
-                
-                # Search for hotels (basic info)
-                city_code = city[:3].upper()
-                logger.info(f"[{run_id}] Fetching real hotel data...")
-                hotel_data = amadeus_service.search_hotels(
-                    city_code=city_code,
-                    max_results=5
-                )
+            origin_code = "LAX"  # Default, could be user's location
+            dest_code = _airport_code(city)
+            
+            if dest_code:
+                now = datetime.now()
+                departure_date = (now + timedelta(days=30)).strftime('%Y-%m-%d')
+                return_date = (now + timedelta(days=30+days)).strftime('%Y-%m-%d')
                 
-            except Exception as e:
-                logger.warning(f"[{run_id}] Could not fetch Amadeus data: {e}")
+                logger.info("[%s] Fetching real flight data...", run_id)
+                lookups.append(amadeus_service.search_flights(
+                    origin=origin_code,
+                    destination=dest_code,
+                    departure_date=departure_date,
+                    return_date=return_date,
+                    adults=1,
+                    max_results=3
+                ))
+            
+            # Search for hotels (basic info)
+            city_code = city[:3].upper()
+            logger.info("[%s] Fetching real hotel data...", run_id)
+            lookups.append(amadeus_service.search_hotels(
+                city_code=city_code,
+                max_results=5
+            ))
+        
+        results = await asyncio.gather(*lookups, return_exceptions=True)
+        hero_image = results[0]
+        flight_data = results[1] if dest_code else None
+        hotel_data = results[-1] if len(results) > 1 else None
+        
+        if isinstance(hero_image, Exception):
+            logger.warning("[%s] Failed to fetch hero image: %s", run_id, hero_image)
+            hero_image = None
+        elif hero_image:
+            logger.info("[%s] Hero image fetched: %s", run_id, hero_image["photographer"])
+        download_location = hero_image["download_location"] if hero_image else ""
+        if isinstance(flight_data, Exception):
+            logger.warning("[%s] Could not fetch Amadeus flight data: %s", run_id, flight_data)
+            flight_data = None
+        if isinstance(hotel_data, Exception):
+            logger.warning("[%s] Could not fetch Amadeus hotel data: %s", run_id, hotel_data)
+            hotel_data = None
         
         try:
             # Build preferences string
@@ -96,177 +283,55 @@ class SimplePlanner:
             budget_str = f"${budget:.2f}" if budget else "flexible budget"
             
             # Build real travel data context
-            travel_data_context = ""
+            context_parts: List[str] = []
             if flight_data and flight_data.get("flights"):
-                cheapest_flight = min(flight_data["flights"], key=lambda x: float(x["price"]["total"]))
-                travel_data_context += f"\n\nReal Flight Data Available:"
-                travel_data_context += f"\n- Cheapest flight: {cheapest_flight['price']['currency']} {cheapest_flight['price']['total']}"
-                travel_data_context += f"\n- {len(flight_data['flights'])} flight options found"
+                flights = flight_data["flights"]
+                prices = [float(flight.price.total) for flight in flights]
+                cheapest_flight = flights[min(range(len(prices)), key=prices.__getitem__)]
+                context_parts.append("\n\nReal Flight Data Available:")
+                context_parts.append(f"\n- Cheapest flight: {cheapest_flight.price.currency} {cheapest_flight.price.total}")
+                context_parts.append(f"\n- {len(flight_data['flights'])} flight options found")
             
             if hotel_data and hotel_data.get("hotels"):
-                travel_data_context += f"\n\nReal Hotel Data Available:"
-                travel_data_context += f"\n- {len(hotel_data['hotels'])} hotels found"
+                context_parts.append("\n\nReal Hotel Data Available:")
+                context_parts.append(f"\n- {len(hotel_data['hotels'])} hotels found")
                 for hotel in hotel_data["hotels"][:3]:
-                    travel_data_context += f"\n  • {hotel['name']}"
+                    context_parts.append(f"\n  • {hotel['name']}")
+            travel_data_context = "".join(context_parts)
             
-            # Create the prompt
-            system_prompt = """You are an expert travel planner AI. Generate detailed, realistic travel itineraries.
-
-CRITICAL REQUIREMENTS FOR LOCATIONS:
-- Every location MUST include a complete, real street address with postal code
-- NEVER use just neighborhood/district names
-- NEVER repeat the same location twice in the entire itinerary
-- Format locations as: "Place Name, Full Street Address with Chome, District, City Postal-Code" 
-  Examples:
-  * "Senso-ji Temple, 2-3-1 Asakusa, Taito, Tokyo 111-0032"
-  * "Shibuya 109, 2 Chome-29-1 Dogenzaka, Shibuya, Tokyo 150-0043"
-  * "Tsukiji Outer Market, 4 Chome-16-2 Tsukiji, Chuo, Tokyo 104-0045"
-  * "Tokyo National Museum, 13-9 Uenokoen, Taito, Tokyo 110-8712"
-- Include the "Chome" format (e.g., "2 Chome-29-1" not "2-29-1")
-- Always include the postal code at the end
-- For restaurants and stores, always provide the complete street address
-- Each activity should have a unique, verifiable location
-
-CRITICAL REQUIREMENTS FOR DESCRIPTIONS (notes field):
-- Every activity MUST have a detailed, engaging description in the "notes" field
-- Write 2-3 sentences (2 sentences preferred, 3 maximum)
-- First sentence: What makes this place special or what visitors will experience
-- Second sentence: A practical tip, historical context, or insider recommendation
-- Example: "This renowned museum houses the world's largest collection of Japanese art, spanning ancient pottery to contemporary works. Arrive early to avoid crowds and don't miss the samurai armor exhibit on the second floor."
-- NEVER write single short phrases like "Discover Japan's rich history through art"
-- Make descriptions informative, specific, and helpful for travelers
-
-Your itineraries should include:
-- Day-by-day breakdown of activities with COMPLETE addresses
-- Named attractions, restaurants with actual names and full addresses with postal codes
-- Practical logistics and timing
-- Local insights and tips
-- Safety and compliance information
-
-Return your response as a structured JSON object with this format:
-{
-  "title": "Trip title",
-  "description": "Brief overview",
-  "daily_schedule": [
-    {
-      "day": 1,
-      "theme": "Day theme",
-      "activities": [
-        {"time": "9:00 AM", "activity": "Activity name", "location": "Place Name, Street Address with Chome, District, City Postal-Code", "notes": "Details"}
-      ]
-    }
-  ],
-  "daily_plans": [
-    {
-      "day": 1,
-      "date": "Day 1",
-      "theme": "Day theme",
-      "plan": [
-        {"time": "7:00 AM", "activity": "Wake up and breakfast", "location": "Cafe Name, Street Address with Chome, District, City Postal-Code", "duration": "1 hour", "notes": "Start your day with freshly baked croissants and locally roasted coffee at this charming neighborhood cafe. The outdoor seating offers great people-watching and the baristas can recommend the best dishes."},
-        {"time": "8:00 AM", "activity": "Morning activity", "location": "Museum Name, Street Address with Chome, District, City Postal-Code", "duration": "2 hours", "notes": "This world-class museum houses over 10,000 artifacts spanning three centuries of cultural history. Arrive early to beat the crowds and don't miss the special exhibition on the third floor."},
-        {"time": "12:00 PM", "activity": "Lunch", "location": "Restaurant Name, Street Address with Chome, District, City Postal-Code", "duration": "1.5 hours", "notes": "Try their signature dish that has been perfected over three generations of family recipes. The lunch set menu offers excellent value and includes seasonal appetizers."},
-        {"time": "2:00 PM", "activity": "Afternoon activity", "location": "Place Name, Street Address with Chome, District, City Postal-Code", "duration": "2 hours", "notes": "Experience breathtaking panoramic views from the observation deck, best visited on clear afternoons. The audio guide provides fascinating historical context and points out landmarks visible from the top."},
-        {"time": "6:00 PM", "activity": "Dinner", "location": "Restaurant Name, Street Address with Chome, District, City Postal-Code", "duration": "2 hours", "notes": "This award-winning restaurant specializes in modern fusion cuisine using local ingredients. Reservations are recommended, and ask for a window seat to enjoy the evening city lights."}
-      ],
-      "total_activities": 5,
-      "estimated_walking": "5 km",
-      "tips": "Wear comfortable shoes"
-    }
-  ],
-  "top_10_places": ["Must-visit place 1", "Must-visit place 2", "Must-visit place 3", "Must-visit place 4", "Must-visit place 5", "Must-visit place 6", "Must-visit place 7", "Must-visit place 8", "Must-visit place 9", "Must-visit place 10"],
-  "recommended_hotels": [
-    {
-      "name": "Hotel Name",
-      "price_range": "$$-$$$",
-      "rating": 4.5,
-      "address": "Street Address, City",
-      "description": "Brief description highlighting key features and why it's recommended"
-    }
-  ],
-  "highlights": ["Specific attraction 1", "Specific attraction 2"],
-  "local_tips": ["Tip 1", "Tip 2"],
-  "compliance": {
-    "visa_required": false,
-    "safety_level": "safe",
-    "vaccinations": []
-  },
-  "estimated_costs": {
-    "accommodation": 0,
-    "food": 0,
-    "activities": 0,
-    "transport": 0,
-    "total": 0
-  }
-}"""
-            
-            user_prompt = f"""Plan a {days}-day trip to {city}, {country}.
-
-Travel Preferences: {pref_str}
-Budget: {budget_str}{travel_data_context}
-
-Please create a comprehensive itinerary that:
-1. Makes the most of {days} days in {city}
-2. Includes activities matching the preferences: {pref_str}
-3. Stays within or around the budget: {budget_str}
-4. Includes practical details like timing and logistics
-5. Provides local insights and safety information
-6. Uses ONLY complete addresses with Chome format and postal codes: "Place Name, # Chome-#-# Street, District, City ###-####" (e.g., "Senso-ji Temple, 2-3-1 Asakusa, Taito, Tokyo 111-0032")
-7. NEVER repeats the same location twice in the itinerary
-8. Keep locations concise - NO full street addresses, postal codes, or detailed address info
-9. Each location must be a specific, named place (museum, restaurant, store, landmark)
-
-IMPORTANT: 
-1. Create a "top_10_places" array with EXACTLY 10 must-visit places/attractions in {city}
-   - These should be the absolute best places a tourist should visit
-   - Include famous landmarks, museums, restaurants, viewpoints, parks, etc.
-   - Format each as "Place Name, City" (e.g., "Sagrada Familia, Barcelona")
-   - Make sure all 10 are unique and different from each other
-
-2. Create a "recommended_hotels" array with EXACTLY 3 best hotels for this destination:
-   - Include hotel name, price_range ($ to $$$$), rating (out of 5), address, and description
-   - Choose hotels with different price points (luxury, mid-range, budget-friendly)
-   - Provide realistic ratings and helpful descriptions about amenities, location benefits
-   - Example: {{"name": "The Ritz Carlton", "price_range": "$$$$", "rating": 4.8, "address": "123 Main St, City", "description": "Luxury waterfront hotel with spa, rooftop bar, and Michelin-star restaurant"}}
-
-3. Create a detailed "daily_plans" section for EACH day with:
-   - Hour-by-hour schedule from 7:00 AM to 8:00 PM
-   - Include breakfast (7-8 AM), lunch (12-1:30 PM), dinner (6-8 PM)
-   - Morning activities (8 AM - 12 PM), afternoon activities (2 PM - 6 PM)
-   - Each activity should have: time, activity name, specific location, duration, and helpful notes
-   - Include estimated walking distances and practical tips for each day
-   - Make sure every time slot is filled with something meaningful
-
-CRITICAL: You MUST include the "recommended_hotels" array with exactly 3 hotels. This is required. Do not skip this field.
-
-Return the itinerary as JSON following the specified format."""
-            
-            # Call the OpenAI API directly
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
+            trip_request = _USER_PROMPT_TEMPLATE.format(
+                days=days,
+                city=city,
+                country=country,
+                pref_str=pref_str,
+                budget_str=budget_str,
             )
             
-            # Parse the response
-            content = response.choices[0].message.content.strip()
-            
-            # Try to extract JSON from the response
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            elif "```" in content:
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
+            # One request covers the whole trip unless its output would not fit
+            # under the completion cap; then the days are split across concurrent
+            # requests, each told only its own days, and merged below.
+            # The Unsplash download ping (attribution, counted for cached images
+            # too) rides along: Lambda freezes once the response is returned, so
+            # a background task would not get to run.
+            *contents, _ = await asyncio.gather(*(
+                self._complete_itinerary(
+                    # Real travel data is trimmed first if the prompt runs over budget
+                    _build_user_prompt(
+                        [
+                            trip_request,
+                            _USER_PROMPT_RULES.format(city=city, day_range=_day_range(start, end, days)),
+                        ],
+                        travel_data_context,
+                    ),
+                    _output_token_budget(end - start + 1),
+                )
+                for start, end in _day_slices(days)
+            ), unsplash_service.trigger_download_async(download_location))
+            content = contents[0]
             
             try:
-                itinerary_data = json.loads(content)
-            except json.JSONDecodeError:
+                itinerary_data = orjson.loads(content)
+            except orjson.JSONDecodeError:
                 # If JSON parsing fails, create a structured response
                 itinerary_data = {
                     "title": f"{days}-Day {city} Adventure",
@@ -284,58 +349,76 @@ Return the itinerary as JSON following the specified format."""
                     }
                 }
             
+            for extra in contents[1:]:
+                try:
+                    extra_data = orjson.loads(extra)
+                except orjson.JSONDecodeError:
+                    logger.warning("[%s] Could not parse a later slice of the itinerary", run_id)
+                    continue
+                _merge_daily_plans(itinerary_data, extra_data)
+            
+            # daily_schedule is a projection of daily_plans, so it is derived here
+            # rather than generated a second time by the model
+            if itinerary_data.get("daily_plans"):
+                itinerary_data["daily_schedule"] = [
+                    {
+                        "day": plan.get("day"),
+                        "theme": plan.get("theme"),
+                        "activities": [
+                            {
+                                "time": item.get("time"),
+                                "activity": item.get("activity"),
+                                "location": item.get("location"),
+                                "notes": item.get("notes")
+                            }
+                            for item in plan.get("plan", [])
+                        ]
+                    }
+                    for plan in itinerary_data["daily_plans"]
+                ]
+            
             # Use top_10_places if available, otherwise collect from activities
             stops = []
             if itinerary_data.get("top_10_places"):
                 # Use the curated top 10 places list
                 stops = itinerary_data["top_10_places"][:10]
             else:
-                # Fallback: collect unique stops from activities
+                # Fallback: unique stops from activities, topped up with highlights,
+                # deduplicated case-insensitively in one ordered pass
+                activity_locations = (
+                    activity.get("location", activity.get("activity", "Activity"))
+                    for day in itinerary_data.get("daily_schedule", [])
+                    for activity in day.get("activities", [])
+                )
                 seen_locations = set()
-                for day in itinerary_data.get("daily_schedule", []):
-                    for activity in day.get("activities", []):
-                        location = activity.get("location", activity.get("activity", "Activity"))
-                        if location and location.lower() not in seen_locations:
-                            stops.append(location)
-                            seen_locations.add(location.lower())
-                
-                # Add highlights if we don't have enough
-                if len(stops) < 10:
-                    for highlight in itinerary_data.get("highlights", [])[:10]:
-                        if highlight and highlight.lower() not in seen_locations:
-                            stops.append(highlight)
-                            seen_locations.add(highlight.lower())
-                            if len(stops) >= 10:
-                                break
+                for location in chain(activity_locations, itinerary_data.get("highlights", [])[:10]):
+                    if not location:
+                        continue
+                    key = location.casefold()
+                    if key not in seen_locations:
+                        seen_locations.add(key)
+                        stops.append(location)
+                        if len(stops) >= 10:
+                            break
             
             # Ensure recommended_hotels exists, generate fallback if missing
             recommended_hotels = itinerary_data.get("recommended_hotels", [])
             if not recommended_hotels:
-                logger.warning(f"[{run_id}] No hotels in LLM response, generating fallback")
+                logger.warning("[%s] No hotels in LLM response, generating fallback", run_id)
+                placeholders = {"city": city, "country": country}
                 recommended_hotels = [
                     {
-                        "name": f"Premium Hotel {city}",
-                        "price_range": "$$$$",
-                        "rating": 4.5,
-                        "address": f"Downtown {city}, {country}",
-                        "description": f"Luxury accommodations in the heart of {city} with premium amenities, rooftop dining, and spa facilities."
-                    },
-                    {
-                        "name": f"Comfort Inn {city}",
-                        "price_range": "$$",
-                        "rating": 4.0,
-                        "address": f"Central {city}, {country}",
-                        "description": f"Modern mid-range hotel offering excellent value with comfortable rooms, complimentary breakfast, and convenient location."
-                    },
-                    {
-                        "name": f"Budget Stay {city}",
-                        "price_range": "$",
-                        "rating": 3.5,
-                        "address": f"{city} City Center, {country}",
-                        "description": f"Clean and affordable accommodations perfect for budget travelers, with basic amenities and friendly service."
+                        key: value.format_map(placeholders) if isinstance(value, str) else value
+                        for key, value in template.items()
                     }
+                    for template in _FALLBACK_HOTELS
                 ]
             
+            research = {
+                "highlights": itinerary_data.get("highlights", []),
+                "local_tips": itinerary_data.get("local_tips", []),
+                "estimated_costs": itinerary_data.get("estimated_costs", {})
+            }
             tour = {
                 "city": city,
                 "country": country,
@@ -347,17 +430,14 @@ Return the itinerary as JSON following the specified format."""
                 "daily_plans": itinerary_data.get("daily_plans", []),  # NEW: Detailed hour-by-hour plans
                 "recommended_hotels": recommended_hotels,  # LLM-generated or fallback hotels
                 "compliance": itinerary_data.get("compliance", {}),
-                "research": {
-                    "highlights": itinerary_data.get("highlights", []),
-                    "local_tips": itinerary_data.get("local_tips", []),
-                    "estimated_costs": itinerary_data.get("estimated_costs", {})
-                },
-                "real_data": {
+                # Optional sections are only included when they carry data
+                **({"research": research} if any(research.values()) else {}),
+                **({"real_data": {
                     "flights": flight_data.get("flights", []) if flight_data else [],
                     "hotels": hotel_data.get("hotels", []) if hotel_data else [],
-                    "has_real_data": bool(flight_data or hotel_data)
-                },
-                "hero_image": hero_image  # Unsplash image data
+                    "has_real_data": True
+                }} if flight_data or hotel_data else {}),
+                **({"hero_image": hero_image} if hero_image else {})  # Unsplash image data
             }
             
             result = {
@@ -372,11 +452,11 @@ Return the itinerary as JSON following the specified format."""
                 "status": "completed"
             }
             
-            logger.info(f"[{run_id}] Itinerary generated successfully")
+            logger.info("[%s] Itinerary generated successfully", run_id)
             return result
         
         except Exception as exc:
-            logger.error(f"[{run_id}] Generation failed: {str(exc)}", exc_info=True)
+            logger.error("[%s] Generation failed: %s", run_id, exc, exc_info=True)
             return {
                 "run_id": run_id,
                 "tour": {},
@@ -385,4 +465,31 @@ Return the itinerary as JSON following the specified format."""
                 "status": "failed",
                 "error": str(exc)
             }
-
+    
+    async def _complete_itinerary(self, user_prompt: str, max_tokens: int) -> str:
+        """Run one streamed JSON-mode completion and return its text."""
+        # Stream the completion so tokens are drained as they arrive
+        # instead of holding one large response body
+        stream = await self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        
+        parts: List[str] = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        finally:
+            # Release the pooled connection even if the stream is abandoned
+            await stream.response.aclose()
+        
+        # JSON mode returns a bare object, no markdown fences to strip
+        return "".join(parts)
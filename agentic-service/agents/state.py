@@ -1,8 +1,17 @@
 """
 State schema for LangGraph planner workflow.
 Tracks data passed between agent nodes.
+
+Agent output fields carry reducers, so nodes return partial updates and
+LangGraph merges concurrent writes instead of each node owning the full dict.
 """
-from typing import TypedDict, Dict, Any, List, Optional
+import operator
+from typing import Annotated, TypedDict, Dict, Any, List, Optional
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer that shallow-merges a node's partial dict into the current value."""
+    return {**left, **right}
 
 
 class PlannerState(TypedDict):
@@ -18,14 +27,14 @@ class PlannerState(TypedDict):
     user_id: Optional[str]
     
     # Agent outputs
-    research_results: Dict[str, Any]
-    logistics_plan: Dict[str, Any]
-    compliance_checks: Dict[str, Any]
-    experience_content: Dict[str, Any]
+    research_results: Annotated[Dict[str, Any], merge_dicts]
+    logistics_plan: Annotated[Dict[str, Any], merge_dicts]
+    compliance_checks: Annotated[Dict[str, Any], merge_dicts]
+    experience_content: Annotated[Dict[str, Any], merge_dicts]
     
     # Final outputs
     final_tour: Dict[str, Any]
-    citations: List[str]
+    citations: Annotated[List[str], operator.add]
     cost: Dict[str, Any]
     status: str
     errors: List[str]
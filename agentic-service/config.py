@@ -21,6 +21,21 @@ class Settings(BaseSettings):
     ollama_base_url: str = "http://localhost:11434"
     faiss_index_path: str = "./data/faiss_index"
     hf_model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # "onnx" embeds with an int8-quantized ONNX export of hf_model_name
+    embedder_backend: str = "torch"
+    onnx_model_dir: str = "./models/minilm-onnx-int8"
+    # PyTorch embedder placement: "auto" uses CUDA when present; fp16 applies on GPU only
+    embedder_device: str = "auto"
+    embedder_fp16: bool = True
+    # HNSW candidate list size per vault query; higher trades latency for recall
+    vault_hnsw_ef_search: int = 32
+    
+    # Build planner/vault at startup instead of on the first request
+    preload_services: bool = False
+    
+    # Multi-agent fan-out
+    max_parallel_agents: int = 4
+    agent_timeout_seconds: float = 60.0
     
     # Optional external APIs
     google_maps_api_key: Optional[str] = None
@@ -1,7 +1,7 @@
 """
 Lambda-specific configuration - minimal dependencies.
 """
-from typing import Optional
+from typing import FrozenSet, Final, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,6 +9,7 @@ class Settings(BaseSettings):
     """Service configuration from environment variables."""
 
     model_config = SettingsConfigDict(
+        frozen=True,
         extra="allow",
         case_sensitive=False,
         env_file=".env",
@@ -17,6 +18,13 @@ class Settings(BaseSettings):
 
     openai_api_key: str
     
+    # CORS: JSON list in ALLOWED_ORIGINS, plus an optional regex for subdomains
+    allowed_origins: FrozenSet[str] = frozenset({"*"})
+    allowed_origin_regex: Optional[str] = None
+    
+    # Build the planner during Lambda init instead of on the first request
+    preload_planner: bool = False
+    
     # Optional external APIs
     google_maps_api_key: Optional[str] = None
     amadeus_api_key: Optional[str] = None
@@ -25,3 +33,6 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+# Read once at cold start; hot paths use these instead of going through settings
+OPENAI_API_KEY: Final[str] = settings.openai_api_key
@@ -1,7 +1,21 @@
 """
 AWS Lambda handler using Mangum to adapt FastAPI.
 """
+import atexit
+
 from mangum import Mangum
-from main_lambda import app
+from config_lambda import settings
+from main_lambda import app, get_planner
+from agents.simple_planner_lambda import get_openai_client
+from services.unsplash_service import unsplash_service
+
+# Build the shared OpenAI client during the init phase so warm invocations
+# reuse its connection pool instead of paying for it on the first request.
+get_openai_client()
+if settings.preload_planner:
+    get_planner()
+
+# Release pooled Unsplash connections when the execution environment shuts down
+atexit.register(unsplash_service.close)
 
 handler = Mangum(app, lifespan="off")
@@ -2,17 +2,23 @@
 FastAPI entrypoint for agentic travel planner service.
 Exposes endpoints for multi-agent itinerary generation.
 """
+import asyncio
 import logging
+import os
 import sys
+import threading
 import typing
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, Any
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Request
+import anyio
+import orjson
+from fastapi import Depends, FastAPI, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from config import settings
 
@@ -34,7 +40,7 @@ if sys.version_info >= (3, 12):
 try:
     from services.vault import VaultIngestionService
 except Exception as vault_error:
-    logger.warning(f"Vault service unavailable: {vault_error}")
+    logger.warning("Vault service unavailable: %s", vault_error)
     VaultIngestionService = None  # type: ignore
 
 try:
@@ -53,17 +59,26 @@ else:
 app = FastAPI(
     title="Agentic Travel Planner",
     description="Multi-agent LangGraph service for itinerary generation",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
+MAX_LOGGED_BODY_BYTES = 4096
+WORKER_THREADS = 64
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+
 # Add validation error handler for debugging
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.error(f"Validation error for {request.url}: {exc.errors()}")
-    logger.error(f"Request body: {await request.body()}")
-    return JSONResponse(
+    body = await request.body()
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error("Validation error for %s: %s", request.url, exc.errors())
+        # Multi-MB uploads can fail validation too; only log the start of the body
+        logger.error("Request body: %r", body[:MAX_LOGGED_BODY_BYTES])
+    return ORJSONResponse(
         status_code=422,
-        content={"detail": exc.errors(), "body": str(await request.body())}
+        content={"detail": exc.errors(), "body": body.decode("utf-8", "replace")}
     )
 
 # CORS for Next.js frontend
@@ -75,22 +90,87 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize planner lazily so ingestion routes still work if LangChain stack is misconfigured.
-if AgenticPlanner is not None:
+# Planner and vault service are built on first use rather than at import, so the
+# process starts quickly and ingestion routes still work if the LangChain stack
+# is misconfigured. FastAPI runs these sync dependencies in its threadpool, and
+# lru_cache does not serialize first calls: without the locks, concurrent first
+# requests could each build a service and load the embedding model twice.
+_planner_lock = threading.Lock()
+_vault_service_lock = threading.Lock()
+
+
+def get_planner() -> Optional[Any]:
+    """Shared planner instance, or None if it cannot be built."""
+    with _planner_lock:
+        return _build_planner()
+
+
+@lru_cache(maxsize=1)
+def _build_planner() -> Optional[Any]:
+    global planner_initialization_error
+    if AgenticPlanner is None:
+        return None
     try:
-        planner = AgenticPlanner()
+        return AgenticPlanner()
     except Exception as planner_error:  # noqa: BLE001
         logger.error("Planner initialization failed", exc_info=True)
-        planner = None
         planner_initialization_error = planner_error
-else:
-    planner = None
+        return None
+
+
+@lru_cache(maxsize=1)
+def _planner_unavailable_detail() -> str:
+    """503 detail for a missing planner; get_planner is memoized, so the reason never changes."""
+    detail = "Planner stack is unavailable. Check server logs for LangChain initialization errors."
+    if planner_initialization_error:
+        detail += f" Reason: {planner_initialization_error}"
+    return detail
+
+
+# document_id -> file on disk, so previews don't rescan the upload directory
+app.state.doc_index: Dict[str, Path] = {}
+
+
+def get_vault_service() -> Optional[Any]:
+    """Shared vault service; also indexes existing uploads by document id."""
+    with _vault_service_lock:
+        return _build_vault_service()
+
+
+@lru_cache(maxsize=1)
+def _build_vault_service() -> Optional[Any]:
+    if VaultIngestionService is None:
+        return None
+    service = VaultIngestionService()
+    
+    # Uploaded files are named "{document_id}_{filename}"
+    upload_dir = service.upload_dir.resolve()
+    if upload_dir.exists():
+        app.state.doc_index = {
+            path.name.split("_", 1)[0]: path
+            for path in upload_dir.iterdir()
+            if path.is_file()
+        }
+    logger.info("Indexed %d vault documents", len(app.state.doc_index))
+    return service
 
-vault_service = VaultIngestionService() if VaultIngestionService else None
+
+@app.on_event("startup")
+async def preload_services():
+    """Size the worker thread pool and optionally build services (PRELOAD_SERVICES)."""
+    # Uploads, previews, vault queries and sync dependencies all run in worker
+    # threads; anyio's default of 40 is easy to exhaust under concurrent uploads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    
+    if settings.preload_services:
+        await asyncio.to_thread(get_planner)
+        await asyncio.to_thread(get_vault_service)
 
 
 class PlanRequest(BaseModel):
     """Request schema for itinerary planning."""
+    model_config = ConfigDict(defer_build=True)
+
     city: str
     country: str
     days: int = 3
@@ -102,6 +182,8 @@ class PlanRequest(BaseModel):
 
 class PlanResponse(BaseModel):
     """Response schema with generated itinerary."""
+    model_config = ConfigDict(defer_build=True)
+
     run_id: str
     tour: Dict[str, Any]
     cost: Dict[str, Any]
@@ -111,6 +193,8 @@ class PlanResponse(BaseModel):
 
 class VaultUploadResponse(BaseModel):
     """Response payload for knowledge vault ingestions."""
+    model_config = ConfigDict(defer_build=True)
+
     documentId: str
     chunkCount: int
     tokenEstimate: int
@@ -120,6 +204,8 @@ class VaultUploadResponse(BaseModel):
 
 class VaultQueryRequest(BaseModel):
     """Request schema for querying knowledge vault."""
+    model_config = ConfigDict(defer_build=True)
+
     query: str
     user_id: str
     top_k: int = 3
@@ -127,6 +213,8 @@ class VaultQueryRequest(BaseModel):
 
 class VaultQueryResponse(BaseModel):
     """Response schema for vault query with RAG answer."""
+    model_config = ConfigDict(defer_build=True)
+
     answer: str
     chunks: list[Dict[str, Any]]
     citations: list[Dict[str, str]]
@@ -135,6 +223,8 @@ class VaultQueryResponse(BaseModel):
 
 class GenerateItineraryRequest(BaseModel):
     """Request schema for generating travel itinerary."""
+    model_config = ConfigDict(defer_build=True)
+
     city: str
     country: str
     days: int
@@ -145,43 +235,47 @@ class GenerateItineraryRequest(BaseModel):
 
 class RefineItineraryRequest(BaseModel):
     """Request schema for refining an existing itinerary."""
+    model_config = ConfigDict(defer_build=True)
+
     run_id: str
     current_itinerary: Dict[str, Any]
     refinement: str
     user_id: str
 
 
+# Health checks hit this constantly; the body never changes, so it is encoded once
+_ROOT_RESPONSE = ORJSONResponse({
+    "service": "agentic-travel-planner",
+    "status": "running",
+    "version": "0.1.0"
+})
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
-    return {
-        "service": "agentic-travel-planner",
-        "status": "running",
-        "version": "0.1.0"
-    }
+    return _ROOT_RESPONSE
 
 
-@app.post("/api/agentic/plan", response_model=PlanResponse)
-async def create_plan(request: PlanRequest):
+@app.post("/api/agentic/plan", responses={200: {"model": PlanResponse}})
+async def create_plan(request: PlanRequest, planner: Optional[Any] = Depends(get_planner)):
     """
     Generate multi-day itinerary using agent orchestration.
     
     Workflow:
     1. Supervisor spawns specialist agents
-    2. Researcher queries RAG + external APIs
-    3. Logistics optimizes route/schedule
-    4. Compliance checks safety/visas
-    5. Experience generates media/copy
-    6. Decision node reconciles, persists to DB
+    2. Specialists fan out concurrently (bounded by max_parallel_agents):
+       - Researcher queries RAG + external APIs
+       - Logistics optimizes route/schedule
+       - Compliance checks safety/visas
+       - Experience generates media/copy
+    3. Decision node reconciles, persists to DB
     """
     if planner is None:
-        detail = "Planner stack is unavailable. Check server logs for LangChain initialization errors."
-        if planner_initialization_error:
-            detail += f" Reason: {planner_initialization_error}"
-        raise HTTPException(status_code=503, detail=detail)
+        raise HTTPException(status_code=503, detail=_planner_unavailable_detail())
 
     try:
-        logger.info(f"Planning request: {request.city}, {request.country} ({request.days} days)")
+        logger.info("Planning request: %s, %s (%d days)", request.city, request.country, request.days)
         
         prefs = request.preferences or {}
         if isinstance(prefs, list):
@@ -196,10 +290,12 @@ async def create_plan(request: PlanRequest):
             user_id=request.user_id
         )
         
-        return PlanResponse(**result)
+        # The planner already returns the PlanResponse shape, so it is not
+        # validated a second time on the way out
+        return result
     
     except Exception as e:
-        logger.error(f"Planning failed: {str(e)}", exc_info=True)
+        logger.error("Planning failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Planning error: {str(e)}")
 
 
@@ -207,11 +303,14 @@ async def create_plan(request: PlanRequest):
 async def get_status(run_id: str):
     """Check status of a planning run."""
     # TODO: query agent run logs from DB
-    return {"run_id": run_id, "status": "completed"}
+    return ORJSONResponse({"run_id": run_id, "status": "completed"})
 
 
 @app.post("/api/v1/agentic/generate-itinerary")
-async def generate_itinerary(request: GenerateItineraryRequest):
+async def generate_itinerary(
+    request: GenerateItineraryRequest,
+    planner: Optional[Any] = Depends(get_planner),
+):
     """
     Generate a new travel itinerary using multi-agent orchestration.
     
@@ -224,22 +323,16 @@ async def generate_itinerary(request: GenerateItineraryRequest):
     Returns a complete itinerary with citations and cost information.
     """
     if planner is None:
-        detail = "Planner stack is unavailable. Check server logs."
-        if planner_initialization_error:
-            detail += f" Reason: {planner_initialization_error}"
-        raise HTTPException(status_code=503, detail=detail)
+        raise HTTPException(status_code=503, detail=_planner_unavailable_detail())
     
     try:
         logger.info(
-            f"[Generate] Trip request: {request.city}, {request.country} "
-            f"({request.days} days) for user {request.user_id}"
+            "[Generate] Trip request: %s, %s (%d days) for user %s",
+            request.city, request.country, request.days, request.user_id
         )
         
         # Convert preferences list to dict format expected by planner
-        preferences_dict = {}
-        if request.preferences:
-            for pref in request.preferences:
-                preferences_dict[pref] = True
+        preferences_dict = {pref: True for pref in request.preferences} if request.preferences else {}
         
         result = await planner.generate_itinerary(
             city=request.city,
@@ -250,11 +343,11 @@ async def generate_itinerary(request: GenerateItineraryRequest):
             user_id=request.user_id
         )
         
-        logger.info(f"[Generate] Successfully generated itinerary: {result.get('run_id')}")
+        logger.info("[Generate] Successfully generated itinerary: %s", result.get("run_id"))
         return result
     
     except Exception as exc:
-        logger.error(f"[Generate] Failed: {str(exc)}", exc_info=True)
+        logger.error("[Generate] Failed: %s", exc, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate itinerary: {str(exc)}"
@@ -262,7 +355,10 @@ async def generate_itinerary(request: GenerateItineraryRequest):
 
 
 @app.post("/api/v1/agentic/refine-itinerary")
-async def refine_itinerary(request: RefineItineraryRequest):
+async def refine_itinerary(
+    request: RefineItineraryRequest,
+    planner: Optional[Any] = Depends(get_planner),
+):
     """
     Refine an existing itinerary based on user feedback.
     
@@ -270,42 +366,20 @@ async def refine_itinerary(request: RefineItineraryRequest):
     and uses the AI to update the itinerary accordingly.
     """
     if planner is None:
-        detail = "Planner stack is unavailable. Check server logs."
-        if planner_initialization_error:
-            detail += f" Reason: {planner_initialization_error}"
-        raise HTTPException(status_code=503, detail=detail)
+        raise HTTPException(status_code=503, detail=_planner_unavailable_detail())
     
     try:
         logger.info(
-            f"[Refine] Refining itinerary {request.run_id} "
-            f"for user {request.user_id}: {request.refinement}"
+            "[Refine] Refining itinerary %s for user %s: %s",
+            request.run_id, request.user_id, request.refinement
         )
         
-        # Use the OpenAI LLM to refine the itinerary
-        from langchain.schema import HumanMessage, SystemMessage
-        
-        system_prompt = """You are a travel planning assistant. You receive an existing itinerary 
-        and a refinement request. Your job is to update the itinerary according to the request while
-        preserving the overall structure and quality. Return the updated itinerary in the same JSON format."""
-        
-        user_prompt = f"""Current Itinerary:
-{request.current_itinerary}
-
-Refinement Request: {request.refinement}
-
-Please update the itinerary to incorporate this change. Return the complete updated itinerary."""
-        
-        response = await planner.openai_llm.ainvoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
-        
-        # Parse the response and construct the updated result
-        # For now, we'll return a modified version of the current itinerary
-        refined_tour = request.current_itinerary.copy()
-        refined_tour["description"] = (
-            f"{refined_tour.get('description', '')} (Refined: {request.refinement})"
-        )
+        # Same path as the streaming route; only the final result event matters here.
+        # The planner falls back to the original tour if the completion can't be parsed.
+        refined_tour = request.current_itinerary
+        async for event in planner.refine_itinerary_stream(request.current_itinerary, request.refinement):
+            if event["type"] == "result":
+                refined_tour = event["tour"]
         
         result = {
             "run_id": request.run_id,
@@ -315,17 +389,103 @@ Please update the itinerary to incorporate this change. Return the complete upda
             "status": "completed"
         }
         
-        logger.info(f"[Refine] Successfully refined itinerary: {request.run_id}")
+        logger.info("[Refine] Successfully refined itinerary: %s", request.run_id)
         return result
     
     except Exception as exc:
-        logger.error(f"[Refine] Failed: {str(exc)}", exc_info=True)
+        logger.error("[Refine] Failed: %s", exc, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to refine itinerary: {str(exc)}"
         ) from exc
 
 
+# Shared by every Server-Sent Events route. "identity" keeps compression
+# middleware or proxies from buffering the stream.
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity",
+}
+
+
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Frame planner events as Server-Sent Events, ending with a done or error event.
+    Every planner event, including "reset", is forwarded unchanged and in order,
+    so a client never sees partials from an abandoned attempt after its reset.
+    """
+    try:
+        async for event in events:
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Planner stream failed", exc_info=True)
+        yield b"data: " + orjson.dumps({"type": "error", "content": str(exc)}) + b"\n\n"
+    else:
+        yield b"data: " + orjson.dumps({"type": "done"}) + b"\n\n"
+
+
+@app.post("/api/v1/agentic/generate-itinerary-stream")
+async def generate_itinerary_stream(
+    request: GenerateItineraryRequest,
+    planner: Optional[Any] = Depends(get_planner),
+):
+    """
+    Streaming variant of generate-itinerary.
+    Emits Server-Sent Events: "partial" tours while the model writes, then the
+    final "result" in the same shape generate-itinerary returns. A "reset" event
+    means the completion was truncated and is being regenerated; clients drop
+    any partial tour received so far and wait for fresh partials.
+    """
+    if planner is None:
+        raise HTTPException(status_code=503, detail=_planner_unavailable_detail())
+    
+    logger.info(
+        "[Generate] Streaming trip request: %s, %s (%d days) for user %s",
+        request.city, request.country, request.days, request.user_id
+    )
+    
+    events = planner.generate_itinerary_stream(
+        city=request.city,
+        country=request.country,
+        days=request.days,
+        budget=request.budget,
+        preferences={pref: True for pref in request.preferences or []},
+        user_id=request.user_id
+    )
+    return StreamingResponse(
+        _sse_events(events),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
+@app.post("/api/v1/agentic/refine-itinerary-stream")
+async def refine_itinerary_stream(
+    request: RefineItineraryRequest,
+    planner: Optional[Any] = Depends(get_planner),
+):
+    """
+    Streaming variant of refine-itinerary.
+    Emits Server-Sent Events: "token" deltas as the model writes, then a
+    "result" event with the refined tour.
+    """
+    if planner is None:
+        raise HTTPException(status_code=503, detail=_planner_unavailable_detail())
+    
+    logger.info(
+        "[Refine] Streaming refinement of %s for user %s: %s",
+        request.run_id, request.user_id, request.refinement
+    )
+    
+    return StreamingResponse(
+        _sse_events(planner.refine_itinerary_stream(request.current_itinerary, request.refinement)),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS,
+    )
+
+
 @app.post("/api/v1/vault/upload")
 async def ingest_vault_document(
     file: UploadFile = File(...),
@@ -333,6 +493,7 @@ async def ingest_vault_document(
     userId: str = Form(...),
     title: str = Form(...),
     notes: Optional[str] = Form(None),
+    vault_service: Optional[Any] = Depends(get_vault_service),
 ):
     """
     Accept a user-uploaded document, extract text, chunk, embed, and persist to FAISS.
@@ -341,14 +502,25 @@ async def ingest_vault_document(
     if not vault_service:
         raise HTTPException(status_code=503, detail="Vault service temporarily unavailable")
     
+    # Reject oversized files before any extraction or embedding work
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"
+        )
+    
     try:
-        result = vault_service.ingest_document(
+        # Extraction, embedding and the FAISS write all block; run them in a worker
+        # thread. UploadFile.file is a plain spooled file, safe to read from there.
+        result = await anyio.to_thread.run_sync(partial(
+            vault_service.ingest_document,
             upload=file,
             document_id=documentId,
             user_id=userId,
             title=title,
             notes=notes,
-        )
+        ))
+        app.state.doc_index[documentId] = _resolved_dir(vault_service.upload_dir) / result["filePath"]
         return result
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -357,22 +529,45 @@ async def ingest_vault_document(
         raise HTTPException(status_code=500, detail="Vault ingestion failed.") from exc
 
 
-@app.post("/api/v1/vault/query", response_model=VaultQueryResponse)
-async def query_vault_documents(request: VaultQueryRequest):
+@app.post("/api/v1/vault/query", responses={200: {"model": VaultQueryResponse}})
+async def query_vault_documents(
+    request: VaultQueryRequest,
+    vault_service: Optional[Any] = Depends(get_vault_service),
+):
     """
     RAG query endpoint: retrieve relevant document chunks and generate answer.
     Filters results by user_id to ensure data isolation.
     """
     try:
-        logger.info(f"Vault query from user {request.user_id}: {request.query}")
+        logger.info("Vault query from user %s: %s", request.user_id, request.query)
+        
+        if not vault_service.has_index(request.user_id):
+            # Empty vault: answer straight away without embedding the query
+            return vault_service.answer_from_chunks(request.query, [])
         
-        result = vault_service.generate_answer(
-            query=request.query,
-            user_id=request.user_id,
-            top_k=request.top_k,
+        # Each RAG step is synchronous, so all of them run in worker threads.
+        # Embedding the query and loading the index are independent; overlap them.
+        async with asyncio.TaskGroup() as tg:
+            embedding_task = tg.create_task(asyncio.to_thread(vault_service.embed_query, request.query))
+            store_task = tg.create_task(
+                asyncio.to_thread(vault_service._load_or_create_index, request.user_id)
+            )
+        
+        chunks = await asyncio.to_thread(
+            vault_service.search_index,
+            store_task.result(),
+            embedding_task.result(),
+            request.top_k,
+        )
+        result = await asyncio.to_thread(
+            vault_service.answer_from_chunks,
+            request.query,
+            chunks,
+            request.user_id,
+            embedding_task.result(),
         )
         
-        return VaultQueryResponse(**result)
+        return result
     
     except Exception as exc:  # noqa: BLE001
         logger.error("Vault query failed", exc_info=True)
@@ -380,13 +575,16 @@ async def query_vault_documents(request: VaultQueryRequest):
 
 
 @app.post("/api/v1/vault/query-stream")
-async def query_vault_documents_stream(request: VaultQueryRequest):
+async def query_vault_documents_stream(
+    request: VaultQueryRequest,
+    vault_service: Optional[Any] = Depends(get_vault_service),
+):
     """
     RAG query endpoint with streaming: retrieve chunks and stream OpenAI response.
     Returns Server-Sent Events for progressive token display.
     """
     try:
-        logger.info(f"Vault streaming query from user {request.user_id}: {request.query}")
+        logger.info("Vault streaming query from user %s: %s", request.user_id, request.query)
         
         return StreamingResponse(
             vault_service.generate_answer_stream(
@@ -395,11 +593,7 @@ async def query_vault_documents_stream(request: VaultQueryRequest):
                 top_k=request.top_k,
             ),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            },
+            headers=_SSE_HEADERS,
         )
     
     except Exception as exc:  # noqa: BLE001
@@ -409,17 +603,134 @@ async def query_vault_documents_stream(request: VaultQueryRequest):
 
 class VaultPreviewResponse(BaseModel):
     """Response schema for document preview."""
+    model_config = ConfigDict(defer_build=True)
+
     content: str
     content_type: str
     filename: str
 
 
+_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+}
+
+
+@lru_cache(maxsize=8)
+def _resolved_dir(directory: Path) -> Path:
+    return directory.resolve()
+
+
+def _resolve_file_path(
+    document_id: str,
+    file_path_hint: Optional[str],
+    filename: Optional[str],
+    upload_dir: Path,
+) -> Optional[Path]:
+    """
+    Locate a vault document on disk: the stored filePath first (most reliable),
+    then the "{document_id}_{filename}" naming convention, then a pattern match.
+    """
+    # First, try to use the stored filePath from database
+    if file_path_hint:
+        file_path = Path(file_path_hint)
+        if not file_path.is_absolute():
+            # If relative path, resolve relative to upload_dir
+            file_path = upload_dir / file_path
+        logger.info("Using stored filePath: %s", file_path)
+        if file_path.exists():
+            return file_path
+        logger.warning("Stored filePath does not exist: %s, trying fallback methods", file_path)
+    
+    # If filePath not provided or didn't work, try to construct from filename
+    if filename:
+        expected_path = upload_dir / f"{document_id}_{filename}"
+        logger.info("Trying filename-based path: %s", expected_path)
+        if expected_path.is_file():
+            logger.info("Found file using filename: %s", expected_path)
+            return expected_path
+        logger.warning("Filename-based path does not exist: %s", expected_path)
+    
+    # Then the startup index, kept current by uploads
+    indexed_path = app.state.doc_index.get(document_id)
+    if indexed_path is not None and indexed_path.is_file():
+        logger.info("Found file in document index: %s", indexed_path)
+        return indexed_path
+    
+    # Last resort: pattern matching (files added outside this process)
+    if not upload_dir.exists():
+        logger.error("Upload directory does not exist: %s", upload_dir)
+        raise HTTPException(status_code=404, detail="Upload directory not found")
+    
+    logger.info("Trying pattern matching for: %s_* in %s", document_id, upload_dir)
+    # One scandir pass: DirEntry names and d_type need no extra stat per entry
+    prefix = f"{document_id}_"
+    with os.scandir(upload_dir) as entries:
+        matching_files = [
+            Path(entry.path)
+            for entry in entries
+            if entry.name.startswith(prefix) and entry.is_file(follow_symlinks=False)
+        ]
+    logger.info("Found %d matching files: %s", len(matching_files), matching_files)
+    if matching_files:
+        logger.info("Found file using pattern matching: %s", matching_files[0])
+        return matching_files[0]
+    return None
+
+
+def _load_preview(
+    vault_service: Any,
+    document_id: str,
+    file_path_hint: Optional[str],
+    filename: Optional[str],
+) -> VaultPreviewResponse:
+    """Blocking part of the preview: find the file and extract its text."""
+    upload_dir = _resolved_dir(vault_service.upload_dir)
+    file_path = _resolve_file_path(document_id, file_path_hint, filename, upload_dir)
+    
+    if not file_path:
+        logger.warning("No files found for document_id: %s", document_id)
+        raise HTTPException(status_code=404, detail=f"Document file not found for ID: {document_id}")
+    
+    # Verify file exists and is readable
+    if not file_path.is_file():
+        logger.error("Path is missing or not a file: %s", file_path)
+        raise HTTPException(status_code=404, detail="Document file not found")
+    
+    logger.info("Found document file: %s", file_path)
+    
+    # Extract text content based on file type
+    try:
+        content = vault_service._extract_text(file_path, None)
+        if not content or not content.strip():
+            logger.warning("Extracted content is empty for file: %s", file_path)
+            content = "(Document content is empty or could not be extracted)"
+    except Exception as extract_error:
+        logger.error("Error extracting text from %s: %s", file_path, extract_error, exc_info=True)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Failed to extract text from document: {str(extract_error)}"
+        ) from extract_error
+    
+    # Determine content type for display
+    content_type = _CONTENT_TYPES.get(file_path.suffix.lower(), "text/plain")
+    
+    return VaultPreviewResponse(
+        content=content,
+        content_type=content_type,
+        filename=file_path.name
+    )
+
+
 @app.get("/api/v1/vault/preview/{document_id}")
 async def preview_vault_document(
     document_id: str,
     user_id: str = Query(...),
     filePath: Optional[str] = Query(None),
-    filename: Optional[str] = Query(None)
+    filename: Optional[str] = Query(None),
+    vault_service: Optional[Any] = Depends(get_vault_service),
 ):
     """
     Retrieve document content for preview.
@@ -429,88 +740,10 @@ async def preview_vault_document(
         raise HTTPException(status_code=503, detail="Vault service temporarily unavailable")
     
     try:
-        logger.info(f"Preview request for document {document_id} by user {user_id}")
-        
-        file_path = None
+        logger.info("Preview request for document %s by user %s", document_id, user_id)
         
-        upload_dir = vault_service.upload_dir.resolve()
-        
-        # First, try to use the stored filePath from database (most reliable)
-        if filePath:
-            file_path = Path(filePath)
-            if not file_path.is_absolute():
-                # If relative path, resolve relative to upload_dir
-                file_path = upload_dir / file_path
-            logger.info(f"Using stored filePath: {file_path}")
-            # Verify it exists
-            if not file_path.exists():
-                logger.warning(f"Stored filePath does not exist: {file_path}, trying fallback methods")
-                file_path = None
-        
-        # If filePath not provided or didn't work, try to construct from filename
-        if not file_path and filename:
-            expected_path = upload_dir / f"{document_id}_{filename}"
-            logger.info(f"Trying filename-based path: {expected_path}")
-            if expected_path.exists() and expected_path.is_file():
-                file_path = expected_path
-                logger.info(f"Found file using filename: {file_path}")
-            else:
-                logger.warning(f"Filename-based path does not exist: {expected_path}")
-        
-        # Last resort: pattern matching
-        if not file_path:
-            if not upload_dir.exists():
-                logger.error(f"Upload directory does not exist: {upload_dir}")
-                raise HTTPException(status_code=404, detail="Upload directory not found")
-            
-            logger.info(f"Trying pattern matching for: {document_id}_* in {upload_dir}")
-            matching_files = list(upload_dir.glob(f"{document_id}_*"))
-            logger.info(f"Found {len(matching_files)} matching files: {[str(f) for f in matching_files]}")
-            if matching_files:
-                file_path = matching_files[0]
-                logger.info(f"Found file using pattern matching: {file_path}")
-        
-        if not file_path:
-            logger.warning(f"No files found for document_id: {document_id}")
-            raise HTTPException(status_code=404, detail=f"Document file not found for ID: {document_id}")
-        
-        # Verify file exists and is readable
-        if not file_path.exists():
-            logger.error(f"File path does not exist: {file_path}")
-            raise HTTPException(status_code=404, detail="Document file not found")
-        
-        if not file_path.is_file():
-            logger.error(f"Path is not a file: {file_path}")
-            raise HTTPException(status_code=404, detail="Document file not found")
-        
-        logger.info(f"Found document file: {file_path}")
-        
-        # Extract text content based on file type
-        try:
-            content = vault_service._extract_text(file_path, None)
-            if not content or not content.strip():
-                logger.warning(f"Extracted content is empty for file: {file_path}")
-                content = "(Document content is empty or could not be extracted)"
-        except Exception as extract_error:
-            logger.error(f"Error extracting text from {file_path}: {extract_error}", exc_info=True)
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Failed to extract text from document: {str(extract_error)}"
-            ) from extract_error
-        
-        content_type = "text/plain"
-        
-        # Determine content type for display
-        if file_path.suffix.lower() == ".pdf":
-            content_type = "application/pdf"
-        elif file_path.suffix.lower() == ".docx":
-            content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        
-        return VaultPreviewResponse(
-            content=content,
-            content_type=content_type,
-            filename=file_path.name
-        )
+        # File lookups and PDF/DOCX extraction block, so keep them off the event loop
+        return await asyncio.to_thread(_load_preview, vault_service, document_id, filePath, filename)
     
     except HTTPException:
         raise
@@ -521,4 +754,15 @@ async def preview_vault_document(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    
+    # uvloop has no Windows build; elsewhere run a few uvloop/httptools workers
+    on_windows = sys.platform == "win32"
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if on_windows else "uvloop",
+        http="httptools",
+        workers=1 if on_windows else min(os.cpu_count() or 1, 4),
+        log_level="info",
+    )
@@ -5,13 +5,14 @@ Vault and database features removed to avoid binary dependencies.
 import logging
 import sys
 import typing
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 from config_lambda import settings
 
@@ -32,51 +33,77 @@ try:
     from agents.simple_planner_lambda import SimplePlanner as AgenticPlanner
     planner_initialization_error = None
 except Exception as planner_error:
-    logger.error(f"Planner import failed: {planner_error}", exc_info=True)
+    logger.error("Planner import failed: %s", planner_error, exc_info=True)
     AgenticPlanner = None
     planner_initialization_error = planner_error
 
 app = FastAPI(
     title="Agentic Travel Planner - Lambda",
     description="Serverless travel itinerary generation",
-    version="0.2.0"
+    version="0.2.0",
+    default_response_class=ORJSONResponse
 )
 
+MAX_LOGGED_BODY_BYTES = 4096
+
+
 # Validation error handler
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.error(f"Validation error for {request.url}: {exc.errors()}")
-    return JSONResponse(
+    body = await request.body()
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error("Validation error for %s: %s", request.url, exc.errors())
+        logger.error("Request body: %r", body[:MAX_LOGGED_BODY_BYTES])
+    return ORJSONResponse(
         status_code=422,
         content={"detail": exc.errors()}
     )
 
 # CORS
+# Credentials are only allowed with explicit origins; a "*" origin with
+# credentials is invalid CORS and browsers reject it
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Lambda needs broader CORS
-    allow_credentials=True,
+    allow_origins=list(settings.allowed_origins),
+    allow_origin_regex=settings.allowed_origin_regex,
+    allow_credentials="*" not in settings.allowed_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # let browsers cache preflights for a day
 )
 
-# Initialize planner
-if AgenticPlanner is not None:
+# The planner is stateless and built on first use, keeping module import fast
+# on cold start. A Lambda instance serves one request at a time, so one is enough.
+@lru_cache(maxsize=1)
+def get_planner() -> Optional[Any]:
+    """Shared planner, or None if it cannot be built."""
+    global planner_initialization_error
+    if AgenticPlanner is None:
+        return None
     try:
-        planner = AgenticPlanner()
+        return AgenticPlanner()
     except Exception as planner_error:
         logger.error("Planner initialization failed", exc_info=True)
-        planner = None
         planner_initialization_error = planner_error
-else:
-    planner = None
+        return None
+
+
+@lru_cache(maxsize=1)
+def _planner_unavailable_detail() -> str:
+    """503 detail for a missing planner; get_planner is memoized, so the reason never changes."""
+    detail = "Planner unavailable"
+    if planner_initialization_error:
+        detail += f": {planner_initialization_error}"
+    return detail
 
 
 class PlanRequest(BaseModel):
     """Request schema for itinerary planning."""
+    model_config = ConfigDict(defer_build=True)
+
     city: str
     country: str
-    days: int = 3
+    days: int = Field(3, ge=1)
     budget: Optional[float] = None
     preferences: Optional[Any] = None
     user_id: Optional[str] = None
@@ -84,6 +111,8 @@ class PlanRequest(BaseModel):
 
 class PlanResponse(BaseModel):
     """Response schema with generated itinerary."""
+    model_config = ConfigDict(defer_build=True)
+
     run_id: str
     tour: Dict[str, Any]
     cost: Dict[str, Any]
@@ -91,29 +120,30 @@ class PlanResponse(BaseModel):
     status: str
 
 
+# Health checks hit this constantly; the body never changes, so it is encoded once
+_ROOT_RESPONSE = ORJSONResponse({
+    "service": "agentic-travel-planner-lambda",
+    "status": "running",
+    "version": "0.2.0"
+})
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
-    return {
-        "service": "agentic-travel-planner-lambda",
-        "status": "running",
-        "version": "0.2.0"
-    }
+    return _ROOT_RESPONSE
 
 
-@app.post("/api/agentic/plan", response_model=PlanResponse)
-async def create_plan(request: PlanRequest):
+@app.post("/api/agentic/plan", responses={200: {"model": PlanResponse}})
+async def create_plan(request: PlanRequest, planner: Optional[Any] = Depends(get_planner)):
     """
     Generate multi-day itinerary using AI.
     """
     if planner is None:
-        detail = "Planner unavailable"
-        if planner_initialization_error:
-            detail += f": {planner_initialization_error}"
-        raise HTTPException(status_code=503, detail=detail)
+        raise HTTPException(status_code=503, detail=_planner_unavailable_detail())
 
     try:
-        logger.info(f"Planning: {request.city}, {request.country} ({request.days} days)")
+        logger.info("Planning: %s, %s (%d days)", request.city, request.country, request.days)
         
         prefs = request.preferences or {}
         if isinstance(prefs, list):
@@ -128,14 +158,16 @@ async def create_plan(request: PlanRequest):
             user_id=request.user_id
         )
         
-        return PlanResponse(**result)
+        # The planner already returns the PlanResponse shape, so it is not
+        # validated a second time on the way out
+        return result
     
     except Exception as e:
-        logger.error(f"Planning failed: {str(e)}", exc_info=True)
+        logger.error("Planning failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Planning error: {str(e)}")
 
 
 @app.get("/api/agentic/status/{run_id}")
 async def get_status(run_id: str):
     """Check status of a planning run."""
-    return {"run_id": run_id, "status": "completed"}
+    return ORJSONResponse({"run_id": run_id, "status": "completed"})
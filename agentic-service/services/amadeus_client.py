@@ -0,0 +1,664 @@
+"""
+Amadeus API integration for real travel data.
+Provides flight search, hotel search, and travel recommendations.
+
+Credentials are injected, so the FastAPI app (services/amadeus_service.py)
+and the Lambda bundle (services/amadeus_service_lambda.py) share this one
+implementation, each with its own settings module.
+
+Talks to the Amadeus REST API directly through one shared httpx.AsyncClient,
+so searches never block the event loop and independent lookups can be
+awaited concurrently with asyncio.gather.
+"""
+import asyncio
+import logging
+import os
+import string
+import tempfile
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping
+from datetime import datetime, timedelta
+
+import httpx
+import orjson
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.http_retry import retry_with_backoff
+from services.rate_limit import AsyncTokenBucket
+
+logger = logging.getLogger(__name__)
+
+AMADEUS_BASE_URL = "https://test.api.amadeus.com"
+
+# Refresh the bearer token this many seconds before Amadeus expires it
+TOKEN_EXPIRY_MARGIN_SECONDS = 30
+
+# The bearer token lives for ~30 minutes. It is kept in module globals so warm
+# invocations reuse it, and mirrored to a temp file so worker processes on the
+# same host skip the OAuth round-trip too.
+_TOKEN_CACHE: Dict[str, Any] = {"access_token": None, "expires_at": 0.0}
+_TOKEN_LOCK = asyncio.Lock()
+TOKEN_CACHE_PATH = Path(tempfile.gettempdir()) / "amadeus_token.json"
+
+# Hotel offers are looked up by hotel ID in comma-separated batches. Not every
+# listed hotel has availability, so a few candidates are fetched per result.
+HOTEL_OFFER_BATCH_SIZE = 10
+HOTEL_OFFER_CONCURRENCY = 8
+HOTEL_OFFER_CANDIDATES_PER_RESULT = 4
+
+# Shared by every search in the process; the free tier allows about 10 TPS
+_AMADEUS_LIMITER = AsyncTokenBucket(max_rate=10, time_period=1)
+
+# During an outage every search would otherwise wait out its timeout and
+# retries; once open, searches return the error stub immediately
+_AMADEUS_BREAKER = CircuitBreaker("Amadeus", fail_max=5, reset_timeout=30)
+
+# Common city to airport mappings, keyed by normalized city name
+_CITY_AIRPORTS: Mapping[str, str] = MappingProxyType({
+    "tokyo": "NRT",
+    "paris": "CDG",
+    "london": "LHR",
+    "new york": "JFK",
+    "los angeles": "LAX",
+    "san francisco": "SFO",
+    "chicago": "ORD",
+    "miami": "MIA",
+    "seattle": "SEA",
+    "boston": "BOS",
+    "rome": "FCO",
+    "barcelona": "BCN",
+    "amsterdam": "AMS",
+    "dubai": "DXB",
+    "singapore": "SIN",
+    "hong kong": "HKG",
+    "sydney": "SYD",
+    "bangkok": "BKK",
+    "seoul": "ICN",
+    "beijing": "PEK"
+})
+
+# Punctuation becomes a space, so "New-York" normalizes like "new york"
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+
+def _normalize_city(city_name: str) -> str:
+    """Lowercase and collapse punctuation, extra whitespace and a "City of" prefix."""
+    key = " ".join(city_name.lower().translate(_PUNCTUATION_TO_SPACE).split())
+    return key.removeprefix("city of ")
+
+
+# Offer records use slotted dataclasses rather than nested dicts: no per-instance
+# hash table, and orjson/FastAPI serialize them to the same JSON shape.
+# Field names deliberately match the JSON keys clients already read.
+
+@dataclass(slots=True)
+class Price:
+    total: Optional[str]
+    currency: Optional[str]
+
+
+@dataclass(slots=True)
+class SegmentEndpoint:
+    airport: Optional[str]
+    time: Optional[str]
+
+
+@dataclass(slots=True)
+class FlightSegment:
+    departure: SegmentEndpoint
+    arrival: SegmentEndpoint
+    carrier: Optional[str]
+    flight_number: Optional[str]
+    duration: Optional[str]
+
+
+@dataclass(slots=True)
+class FlightItinerary:
+    duration: Optional[str]
+    segments: List[FlightSegment]
+
+
+@dataclass(slots=True)
+class FlightOffer:
+    id: Optional[str]
+    price: Price
+    itineraries: List[FlightItinerary]
+
+
+@dataclass(slots=True)
+class GeoLocation:
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+@dataclass(slots=True)
+class HotelAddress:
+    lines: List[str]
+    cityName: Optional[str]
+    countryCode: Optional[str]
+
+
+@dataclass(slots=True)
+class HotelPrice:
+    total: Optional[str]
+    currency: Optional[str]
+    per_night: Optional[float]
+
+
+@dataclass(slots=True)
+class HotelRoom:
+    type: Optional[str]
+    beds: Optional[int]
+    bedType: Optional[str]
+
+
+@dataclass(slots=True)
+class HotelOffer:
+    hotel_id: Optional[str]
+    name: Optional[str]
+    location: GeoLocation
+    address: HotelAddress
+    rating: Optional[str]
+    price: HotelPrice
+    room: HotelRoom
+    amenities: List[str]
+
+
+def _extract_segment(segment: Dict[str, Any]) -> FlightSegment:
+    departure = segment.get('departure') or {}
+    arrival = segment.get('arrival') or {}
+    return FlightSegment(
+        SegmentEndpoint(departure.get('iataCode'), departure.get('at')),
+        SegmentEndpoint(arrival.get('iataCode'), arrival.get('at')),
+        segment.get('carrierCode'),
+        segment.get('number'),
+        segment.get('duration'),
+    )
+
+
+def _extract_flight_offers(data: List[Dict[str, Any]], max_results: int) -> List[FlightOffer]:
+    """Project raw flight-offers into the fields the planner uses, in one pass."""
+    offers = []
+    for offer in data[:max_results]:
+        price = offer.get('price') or {}
+        offers.append(FlightOffer(
+            offer.get('id'),
+            Price(price.get('total'), price.get('currency')),
+            [
+                FlightItinerary(
+                    itinerary.get('duration'),
+                    [_extract_segment(segment) for segment in itinerary.get('segments') or ()],
+                )
+                for itinerary in offer.get('itineraries') or ()
+            ],
+        ))
+    return offers
+
+
+def _token_is_fresh() -> bool:
+    return (
+        bool(_TOKEN_CACHE["access_token"])
+        and time.time() < _TOKEN_CACHE["expires_at"] - TOKEN_EXPIRY_MARGIN_SECONDS
+    )
+
+
+def _load_token_file(client_id: str) -> None:
+    """Adopt a token another process persisted for the same credentials."""
+    try:
+        cached = orjson.loads(TOKEN_CACHE_PATH.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return
+    if cached.get("client_id") == client_id:
+        _TOKEN_CACHE["access_token"] = cached.get("access_token")
+        _TOKEN_CACHE["expires_at"] = cached.get("expires_at", 0.0)
+
+
+def _save_token_file(client_id: str) -> None:
+    # Write-then-rename so readers never see a partial file; owner-only permissions
+    tmp_path = TOKEN_CACHE_PATH.with_name(f"{TOKEN_CACHE_PATH.name}.{os.getpid()}")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as token_file:
+            token_file.write(orjson.dumps({**_TOKEN_CACHE, "client_id": client_id}))
+        os.replace(tmp_path, TOKEN_CACHE_PATH)
+    except OSError as e:
+        logger.debug("Could not persist Amadeus token: %s", e)
+
+
+class AmadeusService:
+    """Service for integrating Amadeus travel APIs."""
+    
+    def __init__(self, settings: Any):
+        """
+        Check API credentials; the HTTP client is built on first use.
+        `settings` is any object with amadeus_api_key and amadeus_api_secret.
+        """
+        self._api_key = settings.amadeus_api_key
+        self._api_secret = settings.amadeus_api_secret
+        self._configured = bool(self._api_key and self._api_secret)
+        
+        if not self._configured:
+            logger.warning("Amadeus API credentials not configured")
+    
+    @cached_property
+    def _client(self) -> httpx.AsyncClient:
+        # Deferred so importing this module (and Lambda cold start) stays cheap
+        # on paths that never call Amadeus. HTTP/2 multiplexes concurrent
+        # searches over one TLS session instead of opening a connection each.
+        client = httpx.AsyncClient(
+            base_url=AMADEUS_BASE_URL,
+            http2=True,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=60),
+            timeout=httpx.Timeout(10.0, connect=2.0),
+        )
+        logger.info("Amadeus API client initialized successfully")
+        return client
+    
+    def is_available(self) -> bool:
+        """Check if Amadeus API is available."""
+        return self._configured
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections, if any were opened."""
+        if "_client" in self.__dict__:
+            await self._client.aclose()
+    
+    async def _get_token(self) -> str:
+        """OAuth2 bearer token, reused until shortly before it expires."""
+        if _token_is_fresh():
+            return _TOKEN_CACHE["access_token"]
+        
+        async with _TOKEN_LOCK:
+            # Another request may have refreshed it while we waited
+            if _token_is_fresh():
+                return _TOKEN_CACHE["access_token"]
+            
+            _load_token_file(self._api_key)
+            if _token_is_fresh():
+                return _TOKEN_CACHE["access_token"]
+            
+            response = await self._client.post(
+                "/v1/security/oauth2/token",
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self._api_key,
+                    "client_secret": self._api_secret,
+                },
+            )
+            response.raise_for_status()
+            payload = orjson.loads(response.content)
+            
+            _TOKEN_CACHE["access_token"] = payload["access_token"]
+            _TOKEN_CACHE["expires_at"] = time.time() + payload["expires_in"]
+            _save_token_file(self._api_key)
+            return _TOKEN_CACHE["access_token"]
+    
+    @_AMADEUS_BREAKER
+    @retry_with_backoff()
+    async def _get(self, path: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """GET an Amadeus endpoint and return the `data` array of its response."""
+        token = await self._get_token()
+        async with _AMADEUS_LIMITER:
+            response = await self._client.get(
+                path,
+                params={key: value for key, value in params.items() if value is not None},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+        response.raise_for_status()
+        # Flight offer payloads run to hundreds of KB; orjson decodes them far faster
+        return orjson.loads(response.content).get("data", [])
+    
+    async def search_flights(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        return_date: Optional[str] = None,
+        adults: int = 1,
+        max_results: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Search for flight offers.
+        
+        Args:
+            origin: Origin airport code (e.g., 'LAX')
+            destination: Destination airport code (e.g., 'NRT')
+            departure_date: Departure date (YYYY-MM-DD)
+            return_date: Return date for round trip (optional)
+            adults: Number of adult passengers
+            max_results: Maximum number of results to return
+        
+        Returns:
+            Dict with flight offers and metadata
+        """
+        if not self.is_available():
+            return {"error": "Amadeus API not configured", "flights": []}
+        
+        try:
+            logger.info("Searching flights: %s → %s on %s", origin, destination, departure_date)
+            
+            data = await self._get("/v2/shopping/flight-offers", {
+                "originLocationCode": origin,
+                "destinationLocationCode": destination,
+                "departureDate": departure_date,
+                "returnDate": return_date,
+                "adults": adults,
+                "max": max_results,
+            })
+            
+            flights = _extract_flight_offers(data, max_results)
+            
+            logger.info("Found %d flight offer(s)", len(flights))
+            return {
+                "flights": flights,
+                "search": {
+                    "origin": origin,
+                    "destination": destination,
+                    "departure_date": departure_date,
+                    "return_date": return_date
+                }
+            }
+        
+        except CircuitOpenError:
+            logger.warning("Amadeus circuit open, skipping search")
+            return {
+                "error": "circuit_open",
+                "flights": []
+            }
+        except httpx.HTTPStatusError as error:
+            logger.error("Amadeus API error: %s", error)
+            return {
+                "error": str(error),
+                "flights": []
+            }
+        except Exception as e:
+            logger.error("Flight search failed: %s", e, exc_info=True)
+            return {
+                "error": str(e),
+                "flights": []
+            }
+    
+    async def search_hotels(
+        self,
+        city_code: str,
+        check_in_date: Optional[str] = None,
+        check_out_date: Optional[str] = None,
+        adults: int = 1,
+        max_results: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Search for hotels in a city.
+        
+        Args:
+            city_code: City code (e.g., 'NYC', 'LON', 'TYO')
+            check_in_date: Check-in date (YYYY-MM-DD)
+            check_out_date: Check-out date (YYYY-MM-DD)
+            adults: Number of guests
+            max_results: Maximum results
+        
+        Returns:
+            Dict with hotel listings
+        """
+        if not self.is_available():
+            return {"error": "Amadeus API not configured", "hotels": []}
+        
+        try:
+            logger.info("Searching hotels in %s", city_code)
+            
+            # First, get hotel list by city
+            data = await self._get(
+                "/v1/reference-data/locations/hotels/by-city",
+                {"cityCode": city_code},
+            )
+            
+            hotels = []
+            for hotel in data[:max_results]:
+                hotel_data = {
+                    "id": hotel.get('hotelId'),
+                    "name": hotel.get('name'),
+                    "location": {
+                        "latitude": hotel.get('geoCode', {}).get('latitude'),
+                        "longitude": hotel.get('geoCode', {}).get('longitude')
+                    },
+                    "address": hotel.get('address', {})
+                }
+                hotels.append(hotel_data)
+            
+            logger.info("Found %d hotel(s) in %s", len(hotels), city_code)
+            return {
+                "hotels": hotels,
+                "search": {
+                    "city_code": city_code,
+                    "check_in": check_in_date,
+                    "check_out": check_out_date
+                }
+            }
+        
+        except CircuitOpenError:
+            logger.warning("Amadeus circuit open, skipping search")
+            return {
+                "error": "circuit_open",
+                "hotels": []
+            }
+        except httpx.HTTPStatusError as error:
+            logger.error("Amadeus API error: %s", error)
+            return {
+                "error": str(error),
+                "hotels": []
+            }
+        except Exception as e:
+            logger.error("Hotel search failed: %s", e, exc_info=True)
+            return {
+                "error": str(e),
+                "hotels": []
+            }
+    
+    async def search_hotel_offers(
+        self,
+        city_code: str,
+        check_in_date: str,
+        check_out_date: str,
+        adults: int = 1,
+        max_results: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Search for hotel offers with pricing and availability.
+        
+        Args:
+            city_code: City code (e.g., 'NYC', 'LON', 'TYO')
+            check_in_date: Check-in date (YYYY-MM-DD)
+            check_out_date: Check-out date (YYYY-MM-DD)
+            adults: Number of guests
+            max_results: Maximum results
+        
+        Returns:
+            Dict with hotel offers including pricing
+        """
+        if not self.is_available():
+            return {"error": "Amadeus API not configured", "hotel_offers": []}
+        
+        try:
+            logger.info("Searching hotel offers in %s for %s to %s", city_code, check_in_date, check_out_date)
+            
+            # hotel-offers only takes hotel IDs, so list the city's hotels first
+            hotels = await self._get("/v1/reference-data/locations/hotels/by-city", {
+                "cityCode": city_code,
+                "radius": 50,
+                "radiusUnit": "KM",
+            })
+            hotel_ids = [
+                hotel["hotelId"]
+                for hotel in hotels[:max_results * HOTEL_OFFER_CANDIDATES_PER_RESULT]
+                if hotel.get("hotelId")
+            ]
+            
+            # Then search for hotel offers with pricing: one request per batch of
+            # IDs, all batches in flight at once
+            semaphore = asyncio.Semaphore(HOTEL_OFFER_CONCURRENCY)
+            
+            async def fetch_offers(batch: List[str]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await self._get("/v3/shopping/hotel-offers", {
+                        "hotelIds": ",".join(batch),
+                        "checkInDate": check_in_date,
+                        "checkOutDate": check_out_date,
+                        "adults": adults,
+                        "roomQuantity": 1,
+                        "currency": "USD",
+                        "bestRateOnly": "true",
+                    })
+            
+            batches = [
+                hotel_ids[start:start + HOTEL_OFFER_BATCH_SIZE]
+                for start in range(0, len(hotel_ids), HOTEL_OFFER_BATCH_SIZE)
+            ]
+            results = await asyncio.gather(*map(fetch_offers, batches), return_exceptions=True)
+            
+            data: List[Dict[str, Any]] = []
+            failures = [result for result in results if isinstance(result, Exception)]
+            for result in results:
+                if not isinstance(result, Exception):
+                    data.extend(result)
+            if failures:
+                if len(failures) == len(results):
+                    raise failures[0]
+                logger.warning("%d of %d hotel offer batch(es) failed: %s", len(failures), len(results), failures[0])
+            
+            # Same stay for every offer, so the nightly divisor is computed once
+            nights = max(1, (
+                datetime.strptime(check_out_date, '%Y-%m-%d')
+                - datetime.strptime(check_in_date, '%Y-%m-%d')
+            ).days)
+            
+            hotel_offers = []
+            for offer in data[:max_results]:
+                hotel = offer.get('hotel') or {}
+                address = hotel.get('address') or {}
+                offers = offer.get('offers') or ()
+                
+                # Get best offer (first one since bestRateOnly=True)
+                best_offer = offers[0] if offers else {}
+                price = best_offer.get('price') or {}
+                total = price.get('total')
+                room_type = (best_offer.get('room') or {}).get('typeEstimated') or {}
+                
+                hotel_offers.append(HotelOffer(
+                    hotel.get('hotelId'),
+                    hotel.get('name'),
+                    GeoLocation(hotel.get('latitude'), hotel.get('longitude')),
+                    HotelAddress(
+                        [address.get('lines', [''])[0]] if address else [],
+                        address.get('cityName'),
+                        address.get('countryCode'),
+                    ),
+                    hotel.get('rating'),
+                    HotelPrice(total, price.get('currency'), float(total) / nights if total else None),
+                    HotelRoom(room_type.get('category'), room_type.get('beds'), room_type.get('bedType')),
+                    hotel.get('amenities', []),
+                ))
+            
+            logger.info("Found %d hotel offer(s) with pricing", len(hotel_offers))
+            return {
+                "hotel_offers": hotel_offers,
+                "search": {
+                    "city_code": city_code,
+                    "check_in": check_in_date,
+                    "check_out": check_out_date
+                }
+            }
+        
+        except CircuitOpenError:
+            logger.warning("Amadeus circuit open, skipping search")
+            return {
+                "error": "circuit_open",
+                "hotel_offers": []
+            }
+        except httpx.HTTPStatusError as error:
+            logger.error("Amadeus API error: %s", error)
+            return {
+                "error": str(error),
+                "hotel_offers": []
+            }
+        except Exception as e:
+            logger.error("Hotel offers search failed: %s", e, exc_info=True)
+            return {
+                "error": str(e),
+                "hotel_offers": []
+            }
+    
+    async def get_flight_inspiration(
+        self,
+        origin: str,
+        max_destinations: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Get cheapest flight destinations from an origin.
+        
+        Args:
+            origin: Origin airport code (e.g., 'LAX')
+            max_destinations: Maximum number of destinations to return
+        
+        Returns:
+            Dict with cheapest destination offers
+        """
+        if not self.is_available():
+            return {"error": "Amadeus API not configured", "destinations": []}
+        
+        try:
+            logger.info("Fetching flight inspiration from %s", origin)
+            
+            data = await self._get("/v1/shopping/flight-destinations", {
+                "origin": origin,
+                "maxPrice": 2000,  # Max price in USD
+            })
+            
+            destinations = []
+            for dest in data[:max_destinations]:
+                destination_data = {
+                    "destination": dest.get('destination'),
+                    "origin": dest.get('origin'),
+                    "price": {
+                        "total": dest.get('price', {}).get('total'),
+                        "currency": "USD"
+                    },
+                    "departure_date": dest.get('departureDate'),
+                    "return_date": dest.get('returnDate'),
+                    "type": dest.get('type')  # One-way or round-trip
+                }
+                destinations.append(destination_data)
+            
+            logger.info("Found %d flight inspiration destination(s)", len(destinations))
+            return {
+                "destinations": destinations,
+                "origin": origin
+            }
+        
+        except CircuitOpenError:
+            logger.warning("Amadeus circuit open, skipping search")
+            return {
+                "error": "circuit_open",
+                "destinations": []
+            }
+        except httpx.HTTPStatusError as error:
+            logger.error("Amadeus API error: %s", error)
+            return {
+                "error": str(error),
+                "destinations": []
+            }
+        except Exception as e:
+            logger.error("Flight inspiration search failed: %s", e, exc_info=True)
+            return {
+                "error": str(e),
+                "destinations": []
+            }
+    
+    def get_airport_code(self, city_name: str) -> Optional[str]:
+        """
+        Get IATA airport code for a city (simplified mapping).
+        In production, use Amadeus Location API.
+        """
+        return _CITY_AIRPORTS.get(_normalize_city(city_name))
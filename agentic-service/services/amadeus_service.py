@@ -1,248 +1,12 @@
 """
-Amadeus API integration for real travel data.
-Provides flight search, hotel search, and travel recommendations.
+Amadeus API integration for the FastAPI app.
+The implementation lives in services/amadeus_client.py; this module binds it
+to the app's settings.
 """
-import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
-
-from amadeus import Client, ResponseError
-
 from config import settings
+from services.amadeus_client import AmadeusService
 
-logger = logging.getLogger(__name__)
-
-
-class AmadeusService:
-    """Service for integrating Amadeus travel APIs."""
-    
-    def __init__(self):
-        """Initialize Amadeus client with API credentials."""
-        if not settings.amadeus_api_key or not settings.amadeus_api_secret:
-            logger.warning("Amadeus API credentials not configured")
-            self.client = None
-            return
-        
-        try:
-            self.client = Client(
-                client_id=settings.amadeus_api_key,
-                client_secret=settings.amadeus_api_secret
-            )
-            logger.info("Amadeus API client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Amadeus client: {e}")
-            self.client = None
-    
-    def is_available(self) -> bool:
-        """Check if Amadeus API is available."""
-        return self.client is not None
-    
-    def search_flights(
-        self,
-        origin: str,
-        destination: str,
-        departure_date: str,
-        return_date: Optional[str] = None,
-        adults: int = 1,
-        max_results: int = 5
-    ) -> Dict[str, Any]:
-        """
-        Search for flight offers.
-        
-        Args:
-            origin: Origin airport code (e.g., 'LAX')
-            destination: Destination airport code (e.g., 'NRT')
-            departure_date: Departure date (YYYY-MM-DD)
-            return_date: Return date for round trip (optional)
-            adults: Number of adult passengers
-            max_results: Maximum number of results to return
-        
-        Returns:
-            Dict with flight offers and metadata
-        """
-        if not self.is_available():
-            return {"error": "Amadeus API not configured", "flights": []}
-        
-        try:
-            logger.info(f"Searching flights: {origin} → {destination} on {departure_date}")
-            
-            response = self.client.shopping.flight_offers_search.get(
-                originLocationCode=origin,
-                destinationLocationCode=destination,
-                departureDate=departure_date,
-                returnDate=return_date,
-                adults=adults,
-                max=max_results
-            )
-            
-            flights = []
-            for offer in response.data:
-                # Extract key information
-                price = offer.get('price', {})
-                itineraries = offer.get('itineraries', [])
-                
-                flight_data = {
-                    "id": offer.get('id'),
-                    "price": {
-                        "total": price.get('total'),
-                        "currency": price.get('currency')
-                    },
-                    "itineraries": []
-                }
-                
-                for itinerary in itineraries:
-                    segments = itinerary.get('segments', [])
-                    itinerary_data = {
-                        "duration": itinerary.get('duration'),
-                        "segments": []
-                    }
-                    
-                    for segment in segments:
-                        departure = segment.get('departure', {})
-                        arrival = segment.get('arrival', {})
-                        
-                        itinerary_data["segments"].append({
-                            "departure": {
-                                "airport": departure.get('iataCode'),
-                                "time": departure.get('at')
-                            },
-                            "arrival": {
-                                "airport": arrival.get('iataCode'),
-                                "time": arrival.get('at')
-                            },
-                            "carrier": segment.get('carrierCode'),
-                            "flight_number": segment.get('number'),
-                            "duration": segment.get('duration')
-                        })
-                    
-                    flight_data["itineraries"].append(itinerary_data)
-                
-                flights.append(flight_data)
-            
-            logger.info(f"Found {len(flights)} flight offer(s)")
-            return {
-                "flights": flights,
-                "search": {
-                    "origin": origin,
-                    "destination": destination,
-                    "departure_date": departure_date,
-                    "return_date": return_date
-                }
-            }
-        
-        except ResponseError as error:
-            logger.error(f"Amadeus API error: {error}")
-            return {
-                "error": str(error),
-                "flights": []
-            }
-        except Exception as e:
-            logger.error(f"Flight search failed: {e}", exc_info=True)
-            return {
-                "error": str(e),
-                "flights": []
-            }
-    
-    def search_hotels(
-        self,
-        city_code: str,
-        check_in_date: Optional[str] = None,
-        check_out_date: Optional[str] = None,
-        adults: int = 1,
-        max_results: int = 10
-    ) -> Dict[str, Any]:
-        """
-        Search for hotels in a city.
-        
-        Args:
-            city_code: City code (e.g., 'NYC', 'LON', 'TYO')
-            check_in_date: Check-in date (YYYY-MM-DD)
-            check_out_date: Check-out date (YYYY-MM-DD)
-            adults: Number of guests
-            max_results: Maximum results
-        
-        Returns:
-            Dict with hotel listings
-        """
-        if not self.is_available():
-            return {"error": "Amadeus API not configured", "hotels": []}
-        
-        try:
-            logger.info(f"Searching hotels in {city_code}")
-            
-            # First, get hotel list by city
-            response = self.client.reference_data.locations.hotels.by_city.get(
-                cityCode=city_code
-            )
-            
-            hotels = []
-            for hotel in response.data[:max_results]:
-                hotel_data = {
-                    "id": hotel.get('hotelId'),
-                    "name": hotel.get('name'),
-                    "location": {
-                        "latitude": hotel.get('geoCode', {}).get('latitude'),
-                        "longitude": hotel.get('geoCode', {}).get('longitude')
-                    },
-                    "address": hotel.get('address', {})
-                }
-                hotels.append(hotel_data)
-            
-            logger.info(f"Found {len(hotels)} hotel(s) in {city_code}")
-            return {
-                "hotels": hotels,
-                "search": {
-                    "city_code": city_code,
-                    "check_in": check_in_date,
-                    "check_out": check_out_date
-                }
-            }
-        
-        except ResponseError as error:
-            logger.error(f"Amadeus API error: {error}")
-            return {
-                "error": str(error),
-                "hotels": []
-            }
-        except Exception as e:
-            logger.error(f"Hotel search failed: {e}", exc_info=True)
-            return {
-                "error": str(e),
-                "hotels": []
-            }
-    
-    def get_airport_code(self, city_name: str) -> Optional[str]:
-        """
-        Get IATA airport code for a city (simplified mapping).
-        In production, use Amadeus Location API.
-        """
-        # Common city to airport mappings
-        city_airports = {
-            "tokyo": "NRT",
-            "paris": "CDG",
-            "london": "LHR",
-            "new york": "JFK",
-            "los angeles": "LAX",
-            "san francisco": "SFO",
-            "chicago": "ORD",
-            "miami": "MIA",
-            "seattle": "SEA",
-            "boston": "BOS",
-            "rome": "FCO",
-            "barcelona": "BCN",
-            "amsterdam": "AMS",
-            "dubai": "DXB",
-            "singapore": "SIN",
-            "hong kong": "HKG",
-            "sydney": "SYD",
-            "bangkok": "BKK",
-            "seoul": "ICN",
-            "beijing": "PEK"
-        }
-        
-        return city_airports.get(city_name.lower())
-
+__all__ = ["AmadeusService", "amadeus_service"]
 
 # Global instance
-amadeus_service = AmadeusService()
-
+amadeus_service = AmadeusService(settings)
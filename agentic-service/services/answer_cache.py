@@ -0,0 +1,116 @@
+"""
+Semantic cache of vault answers.
+A question close enough to an earlier one, asked over the same retrieved
+chunks, gets the earlier answer back without another LLM round trip.
+"""
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_SIMILARITY = 0.95
+ANSWER_CACHE_MAX_ENTRIES = 2048
+# Nearest neighbours checked per lookup; the closest query may belong to someone else
+_CANDIDATES = 8
+
+_INDEX_FILENAME = "answers.faiss"
+_ENTRIES_FILENAME = "answers.json"
+
+
+def _normalized(embedding: np.ndarray) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+    return vector / (np.linalg.norm(vector, axis=1, keepdims=True) + 1e-12)
+
+
+def chunk_set_key(user_id: str, chunks: List[Dict[str, Any]]) -> str:
+    """Identifies the exact sources, in order, an answer was generated from."""
+    sources = [user_id, *((chunk["document_id"], chunk["chunk_index"]) for chunk in chunks)]
+    return hashlib.blake2b(orjson.dumps(sources), digest_size=16).hexdigest()
+
+
+class AnswerCache:
+    """
+    Inner-product index over normalized query embeddings, with a parallel
+    list of {key, answer} entries. Persisted to `directory` on every insert,
+    from a snapshot, so lookups never wait on the disk write.
+    """
+
+    def __init__(self, directory: Path, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        # Serializes writers; versions keep an older snapshot from landing last
+        self._save_lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self._index, self._entries = self._load()
+
+    def _load(self):
+        index_path = self.directory / _INDEX_FILENAME
+        entries_path = self.directory / _ENTRIES_FILENAME
+        if index_path.exists() and entries_path.exists():
+            try:
+                index = faiss.read_index(str(index_path))
+                entries = orjson.loads(entries_path.read_bytes())
+                if index.ntotal == len(entries):
+                    return index, entries
+                logger.warning("Answer cache files out of sync; starting empty")
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Could not load answer cache: %s", exc)
+        return faiss.IndexFlatIP(self.dimension), []
+
+    def _save(self, version: int, index_bytes: bytes, entries_bytes: bytes) -> None:
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries_path = self.directory / _ENTRIES_FILENAME
+            tmp_entries = entries_path.with_suffix(".tmp")
+            tmp_entries.write_bytes(entries_bytes)
+            index_path = self.directory / _INDEX_FILENAME
+            tmp_index = index_path.with_suffix(".faiss.tmp")
+            # serialize_index produces the same bytes write_index would
+            tmp_index.write_bytes(index_bytes)
+            os.replace(tmp_entries, entries_path)
+            os.replace(tmp_index, index_path)
+            self._saved_version = version
+
+    def get(self, query_embedding: np.ndarray, key: str) -> Optional[str]:
+        """The cached answer for a similar query over the same chunks, if any."""
+        with self._lock:
+            if not self._entries:
+                return None
+            scores, ids = self._index.search(
+                _normalized(query_embedding), min(_CANDIDATES, len(self._entries))
+            )
+            for entry_id, score in zip(ids[0].tolist(), scores[0].tolist()):
+                if score < ANSWER_CACHE_SIMILARITY:
+                    break
+                if entry_id >= 0 and self._entries[entry_id]["key"] == key:
+                    return self._entries[entry_id]["answer"]
+        return None
+
+    def put(self, query_embedding: np.ndarray, key: str, answer: str) -> None:
+        with self._lock:
+            if len(self._entries) >= ANSWER_CACHE_MAX_ENTRIES:
+                # Drop the oldest entry; remove_ids keeps the rest in insertion order
+                self._index.remove_ids(np.array([0], dtype=np.int64))
+                del self._entries[0]
+            self._index.add(_normalized(query_embedding))
+            self._entries.append({"key": key, "answer": answer})
+            self._version += 1
+            version = self._version
+            index_bytes = faiss.serialize_index(self._index).tobytes()
+            entries_bytes = orjson.dumps(self._entries)
+        try:
+            self._save(version, index_bytes, entries_bytes)
+        except OSError as exc:
+            logger.warning("Could not persist answer cache: %s", exc)
@@ -0,0 +1,104 @@
+"""
+Process-level circuit breaker for external travel APIs.
+After repeated outage-type failures the breaker opens and calls fail
+immediately instead of each waiting out timeouts and retries; once the
+cooldown passes a single trial call decides whether it closes again.
+"""
+import functools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from services.http_retry import RETRYABLE_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+def is_outage(exc: BaseException) -> bool:
+    """Transport errors, throttling and 5xx count against the breaker; bad requests don't."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Opens after `fail_max` consecutive failures and rejects calls for
+    `reset_timeout` seconds. Usable as a decorator on async functions.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fail_max: int = 5,
+        reset_timeout: float = 30.0,
+        is_failure: Callable[[BaseException], bool] = is_outage,
+    ):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._is_failure = is_failure
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def _before_call(self) -> None:
+        if self._opened_at is None:
+            return
+        if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"{self.name} circuit open")
+        # Half-open: let this one call through to probe the dependency
+        self._trial_in_flight = True
+
+    def _on_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("%s circuit closed", self.name)
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def _on_failure(self, exc: BaseException) -> None:
+        if not self._is_failure(exc):
+            # The dependency answered; the request itself was the problem
+            self._on_success()
+            return
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.fail_max:
+            logger.warning(
+                "%s circuit open for %.0fs after %d failure(s): %s",
+                self.name, self.reset_timeout, self._failures, exc,
+            )
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as exc:
+            self._on_failure(exc)
+            raise
+        except BaseException:
+            # Cancelled: no verdict on the dependency, but free the trial slot
+            self._trial_in_flight = False
+            raise
+        self._on_success()
+        return result
+
+    def __call__(self, func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await self.call(func, *args, **kwargs)
+        return wrapper
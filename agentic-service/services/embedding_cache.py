@@ -0,0 +1,105 @@
+"""
+Disk cache of chunk embeddings keyed by content hash.
+Re-uploading an edited document only embeds the chunks that actually changed.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stays under SQLite's bound-parameter limit on older builds
+_LOOKUP_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+    """
+    Maps blake2b(model name + chunk text) to a float16 embedding in SQLite.
+    Safe to share between the worker threads that run ingestion.
+    """
+
+    def __init__(self, path: Path, model_name: str, dimension: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.hits = 0
+        self.misses = 0
+        # Seeding the hash with the model name keeps a model swap from serving stale vectors
+        self._hasher = hashlib.blake2b(model_name.encode() + b"\0", digest_size=16)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+
+    def _key(self, text: str) -> bytes:
+        hasher = self._hasher.copy()
+        hasher.update(text.encode())
+        return hasher.digest()
+
+    def _fetch(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH_SIZE):
+                batch = keys[start:start + _LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ))
+        return found
+
+    def encode(
+        self,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embed texts, calling encode_fn once for just the uncached ones.
+        Returns an (N, dimension) float32 matrix in input order.
+        """
+        keys = [self._key(text) for text in texts]
+        found = self._fetch(keys)
+        if not found:
+            # Nothing cached: hand back the encoder's matrix instead of copying it
+            embeddings = encode_fn(texts)
+            self._store(keys, embeddings)
+            self._count(len(texts), hits=0)
+            return embeddings
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing: List[int] = []
+        for position, key in enumerate(keys):
+            vector = found.get(key)
+            if vector is None:
+                missing.append(position)
+            else:
+                embeddings[position] = np.frombuffer(vector, dtype=np.float16)
+
+        if missing:
+            encoded = encode_fn([texts[position] for position in missing])
+            embeddings[missing] = encoded
+            self._store([keys[position] for position in missing], encoded)
+
+        self._count(len(texts), hits=len(texts) - len(missing))
+        return embeddings
+
+    def _store(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        rows = [
+            (key, vector.tobytes())
+            for key, vector in zip(keys, vectors.astype(np.float16))
+        ]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+
+    def _count(self, total: int, hits: int) -> None:
+        self.hits += hits
+        self.misses += total - hits
+        logger.info(
+            "Embedding cache: %d/%d chunks cached (%.0f%% hit rate overall)",
+            hits, total, 100 * self.hits / max(1, self.hits + self.misses),
+        )
@@ -0,0 +1,77 @@
+"""
+Retry policy shared by the external travel API clients.
+Retries rate-limited (429) and 5xx responses with capped exponential backoff
+and jitter, honouring the server's Retry-After / X-RateLimit-Reset hints.
+"""
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import httpx
+from tenacity import RetryCallState, retry, retry_if_exception, stop_after_attempt
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Only throttling and server errors are worth repeating; other 4xx never succeed."""
+    return (
+        isinstance(exc, httpx.HTTPStatusError)
+        and exc.response.status_code in RETRYABLE_STATUS_CODES
+    )
+
+
+def _server_delay(response: httpx.Response) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said so."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    reset = response.headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            value = float(reset)
+        except ValueError:
+            return None
+        # Either an epoch timestamp or a number of seconds, depending on the API
+        return max(0.0, value - time.time()) if value > 1e9 else value
+    return None
+
+
+def _backoff(base: float, cap: float) -> Callable[[RetryCallState], float]:
+    def wait(retry_state: RetryCallState) -> float:
+        exc = retry_state.outcome.exception()
+        delay = _server_delay(exc.response) if isinstance(exc, httpx.HTTPStatusError) else None
+        if delay is None:
+            delay = base * 2 ** (retry_state.attempt_number - 1) + random.uniform(0, base)
+        delay = min(cap, delay)
+        logger.warning(
+            "Retrying %s in %.2fs after attempt %d failed: %s",
+            getattr(retry_state.fn, "__qualname__", retry_state.fn),
+            delay, retry_state.attempt_number, exc,
+        )
+        return delay
+    return wait
+
+
+def retry_with_backoff(max_retries: int = 5, base: float = 0.25, cap: float = 8.0):
+    """
+    Decorator retrying a sync or async call that raises httpx.HTTPStatusError
+    on 429/5xx. The last error is re-raised once retries run out.
+    """
+    return retry(
+        retry=retry_if_exception(_is_retryable),
+        wait=_backoff(base, cap),
+        stop=stop_after_attempt(max_retries + 1),
+        reraise=True,
+    )
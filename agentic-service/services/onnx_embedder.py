@@ -0,0 +1,85 @@
+"""
+Int8 ONNX Runtime replacement for the vault's SentenceTransformer embedder.
+Enabled with EMBEDDER_BACKEND=onnx; needs onnxruntime, plus optimum the
+first time, to export and quantize the model.
+"""
+import logging
+from pathlib import Path
+from typing import Any, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_MODEL_FILENAME = "model_quantized.onnx"
+# all-MiniLM-L6-v2 was trained on sequences up to 256 word pieces
+MAX_SEQUENCE_LENGTH = 256
+
+
+def export_quantized_model(model_name: str, model_dir: Path) -> None:
+    """Export `model_name` to ONNX and dynamically quantize its weights to int8."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    logger.info("Exporting %s to int8 ONNX in %s", model_name, model_dir)
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+    # Dynamic quantization needs no calibration data; VNNI kernels where the CPU has them
+    quantizer = ORTQuantizer.from_pretrained(model_dir)
+    quantizer.quantize(
+        save_dir=model_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False),
+    )
+
+
+class OnnxEmbedder:
+    """
+    Mean-pooled, L2-normalized sentence embeddings, matching the
+    SentenceTransformer pipeline for MiniLM. Exposes the subset of
+    SentenceTransformer.encode the vault uses.
+    """
+
+    def __init__(self, model_name: str, model_dir: Path):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        if not (model_dir / QUANTIZED_MODEL_FILENAME).exists():
+            export_quantized_model(model_name, model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_dir / QUANTIZED_MODEL_FILENAME),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode(self, texts: List[str], batch_size: int = 32, **_: Any) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQUENCE_LENGTH,
+                return_tensors="np",
+            )
+            feeds = {
+                name: value.astype(np.int64)
+                for name, value in inputs.items()
+                if name in self._input_names
+            }
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = inputs["attention_mask"][..., np.newaxis].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled)
+
+        embeddings = np.concatenate(batches).astype(np.float32, copy=False)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        return embeddings
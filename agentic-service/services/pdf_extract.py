@@ -0,0 +1,51 @@
+"""
+PDF text extraction for vault uploads, spread over worker processes for
+large files. pypdf is pure Python, so threads would just take turns on
+the GIL. Kept free of the vault's heavy imports (torch, faiss) so worker
+processes start quickly.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterator, List
+
+from pypdf import PdfReader
+
+# Below this many pages, pool start-up and pickling cost more than they save
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_TASK = 16
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+
+@lru_cache(maxsize=1)
+def _executor() -> ProcessPoolExecutor:
+    # forkserver children don't inherit the parent's threads or loaded model
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=MAX_WORKERS,
+        mp_context=multiprocessing.get_context(start_method),
+    )
+
+
+def iter_pdf_pages(path: str) -> Iterator[str]:
+    """Yield each page's text in page order."""
+    reader = PdfReader(path)
+    page_count = len(reader.pages)
+    if page_count < PARALLEL_MIN_PAGES or MAX_WORKERS < 2:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    # Each worker opens the file itself; only page ranges and text cross processes
+    futures = [
+        _executor().submit(_extract_page_range, path, start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ]
+    for future in futures:
+        yield from future.result()
@@ -0,0 +1,68 @@
+"""
+Client-side rate limiting for the external travel APIs.
+Callers queue briefly for a token instead of tripping the provider's limit
+and falling into retry/backoff churn.
+"""
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket allowing `max_rate` acquisitions per `time_period` seconds,
+    with bursts of up to `max_rate`. Waiters are served in arrival order.
+
+        async with limiter:
+            await client.get(...)
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._refill_per_second = max_rate / time_period
+        self._tokens = float(max_rate)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.max_rate,
+            self._tokens + (now - self._updated_at) * self._refill_per_second,
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        # Holding the lock while sleeping keeps later callers queued behind us
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._refill_per_second)
+                self._refill()
+            self._tokens -= 1
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token only if one is free right now; never waits. Fails while
+        another caller is queued, so it can't jump ahead of waiters.
+        """
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def limit_to(self, remaining: int) -> None:
+        """Never hand out more tokens than the server says are left."""
+        self._refill()
+        self._tokens = min(self._tokens, float(remaining))
+
+    async def __aenter__(self) -> "AsyncTokenBucket":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
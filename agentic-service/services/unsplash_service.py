@@ -1,13 +1,41 @@
 """
 Unsplash API service for fetching destination images.
 """
+import asyncio
 import os
 import logging
-from typing import Optional, Dict, Any
+import time
+from functools import cached_property
+from typing import Optional, Dict, Any, Tuple
 import httpx
+import orjson
+
+from services.http_retry import retry_with_backoff
+from services.rate_limit import AsyncTokenBucket
 
 logger = logging.getLogger(__name__)
 
+# The top search result for a destination is stable for days, so lookups are
+# cached to spare the hourly rate limit
+IMAGE_CACHE_TTL_SECONDS = 24 * 60 * 60
+IMAGE_CACHE_MAX_ENTRIES = 512
+# Past this fraction of the TTL, the cached image is served while a fresh one is fetched
+IMAGE_CACHE_REFRESH_FRACTION = 0.8
+
+# Shared by every async caller; 50 req/hour on the demo tier, 5000 in production.
+# An empty bucket would mean a wait of minutes, so callers never queue on it:
+# they skip the image and the planner falls back to its placeholder.
+_unsplash_limiter = AsyncTokenBucket(
+    max_rate=int(os.getenv("UNSPLASH_REQUESTS_PER_HOUR", "50")),
+    time_period=3600,
+)
+
+ImageCacheKey = Tuple[str, str, str]
+
+
+class UnsplashQuotaExhausted(Exception):
+    """No request budget left this hour; the search was not sent."""
+
 
 class UnsplashService:
     """Service for fetching images from Unsplash API."""
@@ -16,9 +44,52 @@ class UnsplashService:
         self.access_key = os.getenv("UNSPLASH_ACCESS_KEY")
         self.base_url = "https://api.unsplash.com"
         
+        # Pooled clients keep connections to api.unsplash.com alive, so only the
+        # first request pays for the TCP + TLS handshake. Both are built on
+        # first use to keep module import cheap.
+        self._client_options: Dict[str, Any] = {
+            "base_url": self.base_url,
+            "headers": {
+                "Authorization": f"Client-ID {self.access_key}",
+                "Accept-Version": "v1",
+            },
+            "timeout": 10.0,
+            "limits": httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60),
+            "http2": True,
+        }
+        
+        # (destination, country, orientation) -> (fetched_at, image data)
+        self._image_cache: Dict[ImageCacheKey, Tuple[float, Dict[str, Any]]] = {}
+        self._refresh_tasks: Dict[ImageCacheKey, asyncio.Task] = {}
+        
         if not self.access_key:
             logger.warning("UNSPLASH_ACCESS_KEY not set - hero images will be unavailable")
     
+    @cached_property
+    def _client(self) -> httpx.Client:
+        return httpx.Client(**self._client_options)
+    
+    @cached_property
+    def _async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**self._client_options)
+    
+    def close(self) -> None:
+        """Close the pooled sync client, if it was opened."""
+        if "_client" in self.__dict__:
+            self._client.close()
+    
+    @staticmethod
+    def _cache_key(destination: str, country: Optional[str], orientation: str) -> ImageCacheKey:
+        return destination.lower(), (country or "").lower(), orientation
+    
+    def _cache_image(self, key: ImageCacheKey, image: Optional[Dict[str, Any]]) -> None:
+        """Remember a fetched image, evicting the oldest entry when full."""
+        if image is None:
+            return
+        if key not in self._image_cache and len(self._image_cache) >= IMAGE_CACHE_MAX_ENTRIES:
+            self._image_cache.pop(next(iter(self._image_cache)))
+        self._image_cache[key] = (time.monotonic(), image)
+    
     def get_destination_image(
         self, 
         destination: str, 
@@ -49,53 +120,82 @@ class UnsplashService:
             logger.warning("Cannot fetch image - Unsplash API key not configured")
             return None
         
+        key = self._cache_key(destination, country, orientation)
+        cached = self._image_cache.get(key)
+        if cached and time.monotonic() - cached[0] < IMAGE_CACHE_TTL_SECONDS:
+            return cached[1]
+        
         try:
-            # Build search query
-            query = f"{destination} travel landmark"
-            if country:
-                query = f"{destination} {country} travel"
-            
-            # Call Unsplash search API
-            url = f"{self.base_url}/search/photos"
-            params = {
-                "query": query,
-                "per_page": 1,
-                "orientation": orientation,
-                "order_by": "relevant",
-            }
-            headers = {
-                "Authorization": f"Client-ID {self.access_key}",
-                "Accept-Version": "v1"
-            }
-            
-            logger.info(f"Fetching Unsplash image for: {query}")
-            
-            with httpx.Client(timeout=10.0) as client:
-                response = client.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-            
-            if not data.get("results"):
-                logger.warning(f"No images found for query: {query}")
-                return None
+            path, params = self._search_request(destination, country, orientation)
+            response = self._search_photos(path, params)
             
-            # Extract first result
-            photo = data["results"][0]
+            image_data = self._image_data(orjson.loads(response.content), destination, params["query"])
+            self._cache_image(key, image_data)
+            return image_data
             
-            image_data = {
-                "url": photo["urls"]["full"],
-                "regular": photo["urls"]["regular"],
-                "small": photo["urls"]["small"],
-                "thumb": photo["urls"]["thumb"],
-                "photographer": photo["user"]["name"],
-                "photographer_url": photo["user"]["links"]["html"],
-                "download_location": photo["links"]["download_location"],
-                "alt_description": photo.get("alt_description", f"{destination} travel destination"),
-            }
+        except httpx.TimeoutException:
+            logger.error("Unsplash API request timed out")
+            return None
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Unsplash API error: {e.response.status_code} - {e.response.text}")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to fetch Unsplash image: {str(e)}", exc_info=True)
+            return None
+    
+    async def get_destination_image_async(
+        self,
+        destination: str,
+        country: str = None,
+        orientation: str = "landscape"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Async variant of get_destination_image that doesn't block the event loop.
+        Requests go through one AsyncClient shared by every call, so warm
+        processes reuse its pooled connections. Entries close to expiry are
+        served immediately and refreshed in the background.
+        """
+        if not self.access_key:
+            logger.warning("Cannot fetch image - Unsplash API key not configured")
+            return None
+        
+        key = self._cache_key(destination, country, orientation)
+        cached = self._image_cache.get(key)
+        if cached:
+            age = time.monotonic() - cached[0]
+            if age < IMAGE_CACHE_TTL_SECONDS:
+                if (
+                    age > IMAGE_CACHE_TTL_SECONDS * IMAGE_CACHE_REFRESH_FRACTION
+                    and key not in self._refresh_tasks
+                ):
+                    task = asyncio.create_task(
+                        self._fetch_image_async(key, destination, country, orientation)
+                    )
+                    self._refresh_tasks[key] = task
+                    task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+                return cached[1]
+        
+        return await self._fetch_image_async(key, destination, country, orientation)
+    
+    async def _fetch_image_async(
+        self,
+        key: ImageCacheKey,
+        destination: str,
+        country: Optional[str],
+        orientation: str
+    ) -> Optional[Dict[str, Any]]:
+        """Query Unsplash for a destination image and cache the result."""
+        try:
+            path, params = self._search_request(destination, country, orientation)
+            response = await self._search_photos_async(path, params)
             
-            logger.info(f"Successfully fetched image by {image_data['photographer']}")
+            image_data = self._image_data(orjson.loads(response.content), destination, params["query"])
+            self._cache_image(key, image_data)
             return image_data
             
+        except UnsplashQuotaExhausted:
+            logger.info("Unsplash hourly quota used up; skipping image for %s", destination)
+            return None
         except httpx.TimeoutException:
             logger.error("Unsplash API request timed out")
             return None
@@ -106,6 +206,70 @@ class UnsplashService:
             logger.error(f"Failed to fetch Unsplash image: {str(e)}", exc_info=True)
             return None
     
+    def _search_request(
+        self,
+        destination: str,
+        country: Optional[str],
+        orientation: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the path and query params for a photo search."""
+        query = f"{destination} travel landmark"
+        if country:
+            query = f"{destination} {country} travel"
+        
+        params = {
+            "query": query,
+            "per_page": 1,
+            "orientation": orientation,
+            "order_by": "relevant",
+        }
+        
+        logger.info(f"Fetching Unsplash image for: {query}")
+        return "/search/photos", params
+    
+    @retry_with_backoff()
+    def _search_photos(self, path: str, params: Dict[str, Any]) -> httpx.Response:
+        response = self._client.get(path, params=params)
+        response.raise_for_status()
+        return response
+    
+    @retry_with_backoff()
+    async def _search_photos_async(self, path: str, params: Dict[str, Any]) -> httpx.Response:
+        if not _unsplash_limiter.try_acquire():
+            raise UnsplashQuotaExhausted()
+        response = await self._async_client.get(path, params=params)
+        
+        # Unsplash reports the remaining hourly quota; don't hand out more than that
+        remaining = response.headers.get("X-Ratelimit-Remaining")
+        if remaining and remaining.isdigit():
+            _unsplash_limiter.limit_to(int(remaining))
+        
+        response.raise_for_status()
+        return response
+    
+    @staticmethod
+    def _image_data(data: Dict[str, Any], destination: str, query: str) -> Optional[Dict[str, Any]]:
+        """Pick the first search result and flatten it into the image dict."""
+        if not data.get("results"):
+            logger.warning(f"No images found for query: {query}")
+            return None
+        
+        photo = data["results"][0]
+        
+        image_data = {
+            "url": photo["urls"]["full"],
+            "regular": photo["urls"]["regular"],
+            "small": photo["urls"]["small"],
+            "thumb": photo["urls"]["thumb"],
+            "photographer": photo["user"]["name"],
+            "photographer_url": photo["user"]["links"]["html"],
+            "download_location": photo["links"]["download_location"],
+            "alt_description": photo.get("alt_description", f"{destination} travel destination"),
+        }
+        
+        logger.info(f"Successfully fetched image by {image_data['photographer']}")
+        return image_data
+    
     def trigger_download(self, download_location: str) -> None:
         """
         Trigger download tracking endpoint (required by Unsplash API guidelines).
@@ -118,11 +282,18 @@ class UnsplashService:
             return
         
         try:
-            headers = {
-                "Authorization": f"Client-ID {self.access_key}",
-            }
-            with httpx.Client(timeout=5.0) as client:
-                client.get(download_location, headers=headers)
+            self._client.get(download_location, timeout=5.0)
+            logger.debug("Triggered Unsplash download tracking")
+        except Exception as e:
+            logger.warning(f"Failed to trigger Unsplash download tracking: {e}")
+    
+    async def trigger_download_async(self, download_location: str) -> None:
+        """Async variant of trigger_download using the shared AsyncClient."""
+        if not self.access_key or not download_location:
+            return
+        
+        try:
+            await self._async_client.get(download_location, timeout=5.0)
             logger.debug("Triggered Unsplash download tracking")
         except Exception as e:
             logger.warning(f"Failed to trigger Unsplash download tracking: {e}")
@@ -1,14 +1,17 @@
 """Utilities for ingesting personal knowledge documents into FAISS."""
 from __future__ import annotations
 
-import math
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Sequence, List, Dict, Any, Generator
-import json
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterable, Iterator, Tuple
 
 from fastapi import UploadFile
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pypdf import PdfReader
 from docx import Document
 import openai
 
@@ -16,8 +19,55 @@ import openai
 from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
+import orjson
+import tiktoken
+import torch
 
 from config import settings
+from services.answer_cache import AnswerCache, chunk_set_key
+from services.embedding_cache import EmbeddingCache
+from services.pdf_extract import iter_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+# HNSW graph search instead of a brute-force flat scan. IVF/PQ indexes need
+# tens of thousands of vectors to train, far more than a personal vault holds.
+# Vectors are stored as fp16: half the memory and bandwidth, near-identical recall.
+VAULT_INDEX_FACTORY = "HNSW32,SQfp16"
+# Graph build effort; search effort is settings.vault_hnsw_ef_search
+HNSW_EF_CONSTRUCTION = 80
+INDEX_FILENAME = "vault.faiss"
+# One JSON record per vector, in insertion order, so vector id == line number
+METADATA_FILENAME = "metadata.jsonl"
+EMBED_BATCH_SIZE = 64
+UPLOAD_COPY_BUFFER_BYTES = 1024 * 1024
+# Token windows close to the previous 800/200-character chunks, and well inside
+# MiniLM's 256-wordpiece input limit
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP_TOKENS = 50
+# Extracted text is split in segments of roughly this size, so a document's full
+# text is never held at once; small pages and paragraphs are merged up to it.
+TEXT_SEGMENT_CHARS = 32 * 1024
+# Opened user shards kept in memory for queries, least recently used evicted first
+INDEX_CACHE_MAX_SHARDS = 32
+
+
+def _sse_event(event: Dict[str, Any]) -> bytes:
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+# Token events are sent once per streamed delta; only the content varies
+_TOKEN_EVENT_PREFIX = b'data: {"type":"token","content":'
+_TOKEN_EVENT_SUFFIX = b"}\n\n"
+_DONE_EVENT = _sse_event({"type": "done"})
+
+
+@dataclass(slots=True)
+class VaultIndex:
+    """A FAISS index plus the chunk records its vector ids point into."""
+
+    index: faiss.Index
+    records: List[Dict[str, Any]]
 
 
 class VaultIngestionService:
@@ -32,14 +82,60 @@ class VaultIngestionService:
         self.index_dir = Path(settings.faiss_index_path)
         self.index_dir.mkdir(parents=True, exist_ok=True)
 
-        # Embedder + splitter reused across requests to avoid reload overhead.
-        self.embedder_model = SentenceTransformer(settings.hf_model_name)
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,
-            chunk_overlap=200,
-        )
-        # Simple FAISS index (will be loaded/created as needed)
+        # Embedder + tokenizer reused across requests to avoid reload overhead.
+        self.embedder_model, self.embedder_name = self._load_embedder()
+        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        # Per-user FAISS shards are opened or created on demand
         self.dimension = 384  # MiniLM embedding dimension
+        # Unchanged chunks of a re-uploaded document skip the forward pass
+        self.embedding_cache = EmbeddingCache(
+            base_dir / "data" / "embed_cache" / "embeddings.sqlite3",
+            self.embedder_name,
+            self.dimension,
+        )
+        # One client per flavour, so answers reuse pooled keep-alive connections
+        # to OpenAI. Streaming answers are awaited on the event loop.
+        self.openai_client = openai.OpenAI(
+            api_key=settings.openai_api_key, max_retries=2, timeout=60.0
+        )
+        self.async_openai_client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key, max_retries=2, timeout=60.0
+        )
+        # Near-duplicate questions over the same chunks reuse the earlier answer
+        self.answer_cache = AnswerCache(self.index_dir / "answer_cache", self.dimension)
+        # Ingests run in worker threads; serialise load -> add -> save
+        self._index_lock = threading.Lock()
+        # user_id -> (index file mtime_ns, read-only index), in LRU order
+        self._index_cache: Dict[str, Tuple[int, VaultIndex]] = {}
+        self._index_cache_lock = threading.Lock()
+
+    @staticmethod
+    def _load_embedder() -> Tuple[Any, str]:
+        """
+        The embedder plus a name identifying its outputs; int8 ONNX vectors
+        differ slightly from PyTorch ones, so they are cached separately.
+        """
+        if settings.embedder_backend == "onnx":
+            try:
+                from services.onnx_embedder import OnnxEmbedder
+                embedder = OnnxEmbedder(settings.hf_model_name, Path(settings.onnx_model_dir))
+                return embedder, f"{settings.hf_model_name}:onnx-int8"
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("ONNX embedder unavailable, using PyTorch: %s", exc)
+
+        device = settings.embedder_device
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        embedder = SentenceTransformer(settings.hf_model_name, device=device)
+        if device.startswith("cuda") and settings.embedder_fp16:
+            embedder.half()
+            # fp16 can overflow in some models; keep fp32 if the probe isn't finite
+            probe = embedder.encode(["half precision check"], convert_to_numpy=True)
+            if not np.isfinite(probe).all():
+                logger.warning("Embedder produced non-finite values in fp16; using fp32")
+                embedder.float()
+        logger.info("Vault embedder on %s (%s)", device, next(embedder.parameters()).dtype)
+        return embedder, settings.hf_model_name
 
     def ingest_document(
         self,
@@ -51,17 +147,18 @@ class VaultIngestionService:
         notes: Optional[str] = None,
     ) -> dict:
         saved_path = self._persist_upload(upload, document_id)
-        raw_text = self._extract_text(saved_path, upload.content_type)
-        if not raw_text.strip():
-            raise ValueError("Uploaded document does not contain extractable text.")
-
-        chunks = self.splitter.split_text(raw_text)
+        chunks: List[str] = []
+        token_count = 0
+        for segment in self._iter_text_segments(saved_path, upload.content_type):
+            segment_chunks, segment_tokens = self._split_text(segment)
+            chunks.extend(segment_chunks)
+            token_count += segment_tokens
         if not chunks:
-            raise ValueError("Unable to generate chunks from uploaded document.")
+            raise ValueError("Uploaded document does not contain extractable text.")
 
-        store = self._load_or_create_index()
-        metadatas = [
+        records = [
             {
+                "text": chunk,
                 "document_id": document_id,
                 "user_id": user_id,
                 "chunk_index": idx,
@@ -69,16 +166,19 @@ class VaultIngestionService:
                 "notes": notes,
                 "source_path": str(saved_path),
             }
-            for idx in range(len(chunks))
+            for idx, chunk in enumerate(chunks)
         ]
-
-        if store:
-            store.add_texts(chunks, metadatas=metadatas)
-        else:
-            store = FAISS.from_texts(chunks, embedding=self.embedder, metadatas=metadatas)
-
-        store.save_local(str(self.index_dir))
-        token_estimate = math.ceil(len(raw_text) / 4)
+        embeddings = self.embedding_cache.encode(chunks, self._encode)
+
+        with self._index_lock:
+            # A private, writable copy; the cached one may be mid-search
+            store = self._read_index(user_id) or self._new_index()
+            if not store.index.is_trained:
+                # fp16 needs no value ranges, so training on the first upload is enough
+                store.index.train(embeddings)
+            store.index.add(embeddings)
+            store.records.extend(records)
+            self._save_index(store, user_id)
 
         # Store relative path from upload_dir for portability
         relative_path = saved_path.relative_to(self.upload_dir)
@@ -86,87 +186,265 @@ class VaultIngestionService:
         return {
             "documentId": document_id,
             "chunkCount": len(chunks),
-            "tokenEstimate": token_estimate,
+            "tokenEstimate": token_count,
             "filePath": str(relative_path),
             "message": "Document ingested and indexed.",
         }
 
+    def _split_text(self, text: str) -> Tuple[List[str], int]:
+        """
+        Cut text into CHUNK_TOKENS-token windows overlapping by
+        CHUNK_OVERLAP_TOKENS. Returns the chunks and the text's token count.
+        """
+        tokens = self.tokenizer.encode_ordinary(text)
+        stride = CHUNK_TOKENS - CHUNK_OVERLAP_TOKENS
+        chunks: List[str] = []
+        # The last window starts before the tail that the previous one already covers
+        for start in range(0, max(len(tokens) - CHUNK_OVERLAP_TOKENS, 1), stride):
+            window = self.tokenizer.decode_bytes(tokens[start:start + CHUNK_TOKENS])
+            # A window edge can fall inside a multi-byte character; drop the fragment
+            chunk = window.decode("utf-8", errors="ignore").strip()
+            if chunk:
+                chunks.append(chunk)
+        return chunks, len(tokens)
+
     def _persist_upload(self, upload: UploadFile, document_id: str) -> Path:
         target_path = self.upload_dir / f"{document_id}_{upload.filename or 'document'}"
+        source = upload.file
+        source.seek(0)
         with target_path.open("wb") as destination:
-            contents = upload.file.read()
-            destination.write(contents)
-        upload.file.seek(0)
+            # Large uploads are spooled to a real temp file: copy it in the kernel
+            if not (getattr(source, "_rolled", False) and self._sendfile(source, destination)):
+                shutil.copyfileobj(source, destination, length=UPLOAD_COPY_BUFFER_BYTES)
+        source.seek(0)
         return target_path
 
+    @staticmethod
+    def _sendfile(source, destination) -> bool:
+        """Zero-copy file-to-file copy; False if the platform or filesystem refuses."""
+        if not hasattr(os, "sendfile"):
+            return False
+        try:
+            size = os.fstat(source.fileno()).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(destination.fileno(), source.fileno(), offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+        except OSError:
+            # Start over with a plain copy
+            destination.seek(0)
+            destination.truncate()
+            source.seek(0)
+            return False
+        return True
+
+    @staticmethod
+    def _is_pdf(path: Path, content_type: Optional[str]) -> bool:
+        return "pdf" in (content_type or "").lower() or path.suffix.lower() == ".pdf"
+
     def _extract_text(self, path: Path, content_type: Optional[str]) -> str:
+        return "\n".join(self._iter_text_segments(path, content_type))
+
+    def _iter_text_segments(self, path: Path, content_type: Optional[str]) -> Iterator[str]:
+        """
+        Stream a document's text in segments of about TEXT_SEGMENT_CHARS;
+        joined with newlines they give the full text.
+        """
         suffix = path.suffix.lower()
         content_type = (content_type or "").lower()
 
-        if "pdf" in content_type or suffix == ".pdf":
-            return self._extract_pdf_text(path)
+        if self._is_pdf(path, content_type):
+            return self._coalesce(self._iter_pdf_pages(path))
 
         if "wordprocessingml" in content_type or suffix == ".docx":
-            return self._extract_docx_text(path)
+            return self._coalesce(self._iter_docx_paragraphs(path))
 
-        data = path.read_text(encoding="utf-8", errors="ignore")
-        return data
+        return self._coalesce(self._iter_text_lines(path))
 
     @staticmethod
-    def _extract_pdf_text(path: Path) -> str:
-        reader = PdfReader(str(path))
-        text_segments: list[str] = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text_segments.append(page_text)
-        return "\n".join(text_segments)
+    def _coalesce(pieces: Iterable[str]) -> Iterator[str]:
+        buffer: List[str] = []
+        size = 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece) + 1
+            if size >= TEXT_SEGMENT_CHARS:
+                yield "\n".join(buffer)
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield "\n".join(buffer)
 
     @staticmethod
-    def _extract_docx_text(path: Path) -> str:
+    def _iter_pdf_pages(path: Path) -> Iterator[str]:
+        """Yield each page's text in page order; large PDFs use a process pool."""
+        return iter_pdf_pages(str(path))
+
+    @staticmethod
+    def _iter_docx_paragraphs(path: Path) -> Iterator[str]:
         document = Document(str(path))
-        return "\n".join(paragraph.text for paragraph in document.paragraphs)
-
-    def _load_or_create_index(self):
-        index_files = list(self.index_dir.glob("*"))
-        if index_files:
-            return FAISS.load_local(
-                str(self.index_dir),
-                self.embedder,
+        for paragraph in document.paragraphs:
+            yield paragraph.text
+
+    @staticmethod
+    def _iter_text_lines(path: Path) -> Iterator[str]:
+        with path.open(encoding="utf-8", errors="ignore") as text_file:
+            for line in text_file:
+                yield line.rstrip("\n")
+
+    def _new_index(self) -> VaultIndex:
+        index = faiss.index_factory(self.dimension, VAULT_INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return VaultIndex(index=index, records=[])
+
+    def _shard_dir(self, user_id: str) -> Path:
+        """Each user gets their own index, so searches never touch other users' vectors."""
+        # Hashed so arbitrary user ids are safe as directory names
+        return self.index_dir / "users" / hashlib.sha256(user_id.encode()).hexdigest()[:32]
+
+    def has_index(self, user_id: str) -> bool:
+        """
+        Whether the user has uploaded anything. Lets callers skip embedding
+        the query for empty vaults; shards already in memory need no stat.
+        """
+        return (
+            user_id in self._index_cache
+            or (self._shard_dir(user_id) / INDEX_FILENAME).exists()
+        )
+
+    def _load_or_create_index(self, user_id: str) -> Optional[VaultIndex]:
+        """
+        The user's index for searching. Kept in memory and reopened only
+        when an ingest has replaced the shard file since it was loaded.
+        """
+        try:
+            mtime = (self._shard_dir(user_id) / INDEX_FILENAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._index_cache_lock:
+            cached = self._index_cache.pop(user_id, None)
+            if cached and cached[0] == mtime:
+                self._index_cache[user_id] = cached
+                return cached[1]
+
+        store = self._read_index(user_id, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        if store is None:
+            return None
+        with self._index_cache_lock:
+            self._index_cache[user_id] = (mtime, store)
+            while len(self._index_cache) > INDEX_CACHE_MAX_SHARDS:
+                self._index_cache.pop(next(iter(self._index_cache)))
+        return store
+
+    def _read_index(self, user_id: str, io_flags: int = 0) -> Optional[VaultIndex]:
+        shard_dir = self._shard_dir(user_id)
+        index_path = shard_dir / INDEX_FILENAME
+        if not index_path.exists():
+            return None
+        index = faiss.read_index(str(index_path), io_flags)
+        with (shard_dir / METADATA_FILENAME).open("rb") as metadata_file:
+            # A crash between the two writes can leave extra trailing records
+            records = [orjson.loads(line) for _, line in zip(range(index.ntotal), metadata_file)]
+        return VaultIndex(index=index, records=records)
+
+    def _save_index(self, store: VaultIndex, user_id: str) -> None:
+        """
+        Write metadata, then the index, each via an atomic rename. Readers
+        never see an index whose ids point past the end of the metadata.
+        """
+        shard_dir = self._shard_dir(user_id)
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        metadata_path = shard_dir / METADATA_FILENAME
+        tmp_metadata = metadata_path.with_suffix(".tmp")
+        with tmp_metadata.open("wb") as metadata_file:
+            metadata_file.writelines(orjson.dumps(record) + b"\n" for record in store.records)
+        os.replace(tmp_metadata, metadata_path)
+
+        index_path = shard_dir / INDEX_FILENAME
+        tmp_index = index_path.with_suffix(".tmp")
+        faiss.write_index(store.index, str(tmp_index))
+        os.replace(tmp_index, index_path)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into one preallocated (N, dimension) float32 matrix of
+        unit vectors, in input order. Texts go through in length-sorted
+        batches, so each batch pads to similar lengths.
+        """
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            rows = order[start:start + EMBED_BATCH_SIZE]
+            # Each batch lands straight in its rows (fp16 output from a half model is upcast)
+            embeddings[rows] = self.embedder_model.encode(
+                [texts[row] for row in rows],
+                batch_size=EMBED_BATCH_SIZE,
+                convert_to_numpy=True,
+                show_progress_bar=False,
             )
-        return None
+        # Unit length makes inner product equal cosine similarity
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        return embeddings
 
-    def query_documents(
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query with the same model used for the stored chunks."""
+        return self._encode([query])[0]
+
+    def search_index(
         self,
-        query: str,
-        user_id: str,
+        store: Optional[VaultIndex],
+        query_embedding: np.ndarray,
         top_k: int = 5,
     ) -> List[Dict[str, Any]]:
         """
-        Query FAISS index for documents relevant to user's question.
-        Filters results by user_id to ensure data isolation.
+        Search a user's loaded index with a precomputed query embedding.
+        The index only holds that user's chunks, so no filtering is needed.
         """
-        store = self._load_or_create_index()
         if not store:
             return []
 
         # Retrieve top results with scores
-        results = store.similarity_search_with_score(query, k=top_k * 3)
-
-        # Filter by user_id and format results
-        filtered_results = []
-        for doc, score in results:
-            if doc.metadata.get("user_id") == user_id:
-                filtered_results.append({
-                    "text": doc.page_content,
-                    "title": doc.metadata.get("title", "Unknown"),
-                    "document_id": doc.metadata.get("document_id"),
-                    "chunk_index": doc.metadata.get("chunk_index", 0),
-                    "relevance_score": float(score),
-                })
-                if len(filtered_results) >= top_k:
-                    break
+        # Per-call parameters: cached shards are shared by concurrent searches
+        distances, ids = store.index.search(
+            query_embedding.reshape(1, -1),
+            top_k,
+            params=faiss.SearchParametersHNSW(efSearch=settings.vault_hnsw_ef_search),
+        )
 
-        return filtered_results
+        results = []
+        for vector_id, score in zip(ids[0].tolist(), distances[0].tolist()):
+            if vector_id < 0:
+                # FAISS pads with -1 when fewer than k vectors exist
+                break
+            record = store.records[vector_id]
+            results.append({
+                "text": record["text"],
+                "title": record.get("title", "Unknown"),
+                "document_id": record.get("document_id"),
+                "chunk_index": record.get("chunk_index", 0),
+                "relevance_score": score,
+            })
+
+        return results
+
+    def query_documents(
+        self,
+        query: str,
+        user_id: str,
+        top_k: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query the user's FAISS index for documents relevant to their question.
+        """
+        if not self.has_index(user_id):
+            return []
+        store = self._load_or_create_index(user_id)
+        if not store:
+            return []
+        return self.search_index(store, self.embed_query(query), top_k)
 
     def generate_answer(
         self,
@@ -178,9 +456,43 @@ class VaultIngestionService:
         RAG pipeline: retrieve relevant chunks, generate answer with OpenAI.
         Returns answer with citations.
         """
+        if not self.has_index(user_id):
+            return self.answer_from_chunks(query, [])
+
         # Retrieve relevant document chunks
-        chunks = self.query_documents(query, user_id, top_k)
+        query_embedding = self.embed_query(query)
+        chunks = self.search_index(self._load_or_create_index(user_id), query_embedding, top_k)
+        return self.answer_from_chunks(query, chunks, user_id, query_embedding)
 
+    @staticmethod
+    def _build_context(chunks: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, str]]]:
+        """Numbered [Source N] context for the prompt, plus one citation per document."""
+        context = "\n\n".join(map(
+            "[Source {0}] {1}".format,
+            range(1, len(chunks) + 1),
+            (chunk["text"] for chunk in chunks),
+        ))
+        # First title seen per document, in retrieval order
+        doc_titles: Dict[str, str] = {}
+        for chunk in chunks:
+            doc_titles.setdefault(chunk["document_id"], chunk["title"])
+        citations = [
+            {"title": title, "document_id": document_id}
+            for document_id, title in doc_titles.items()
+        ]
+        return context, citations
+
+    def answer_from_chunks(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        user_id: Optional[str] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate a cited answer with OpenAI from already retrieved chunks.
+        Given the user and query embedding, the semantic answer cache is used.
+        """
         if not chunks:
             return {
                 "answer": "I don't have any documents in your Knowledge Vault yet. Please upload some travel guides or notes first!",
@@ -189,24 +501,21 @@ class VaultIngestionService:
             }
 
         # Build context from top chunks
-        context_parts = []
-        citations = []
-        seen_docs = set()
-
-        for idx, chunk in enumerate(chunks, 1):
-            context_parts.append(f"[Source {idx}] {chunk['text']}")
-            doc_key = (chunk["document_id"], chunk["title"])
-            if doc_key not in seen_docs:
-                citations.append({
-                    "title": chunk["title"],
-                    "document_id": chunk["document_id"],
-                })
-                seen_docs.add(doc_key)
-
-        context = "\n\n".join(context_parts)
+        context, citations = self._build_context(chunks)
+
+        cache_key = None
+        if user_id is not None and query_embedding is not None:
+            cache_key = chunk_set_key(user_id, chunks)
+            cached_answer = self.answer_cache.get(query_embedding, cache_key)
+            if cached_answer is not None:
+                return {
+                    "answer": cached_answer,
+                    "chunks": chunks,
+                    "citations": citations,
+                    "tokens_used": 0,
+                }
 
         # Generate answer with OpenAI
-        client = openai.OpenAI(api_key=settings.openai_api_key)
         system_prompt = """You are a helpful travel assistant. Answer the user's question based on the provided context from their uploaded documents.
 
 IMPORTANT:
@@ -223,7 +532,7 @@ User's question: {query}
 Answer the question based on the context above. Include [Source N] citations."""
 
         try:
-            response = client.chat.completions.create(
+            response = self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -234,6 +543,8 @@ Answer the question based on the context above. Include [Source N] citations."""
             )
 
             answer = response.choices[0].message.content
+            if cache_key is not None:
+                self.answer_cache.put(query_embedding, cache_key, answer)
 
             return {
                 "answer": answer,
@@ -250,45 +561,47 @@ Answer the question based on the context above. Include [Source N] citations."""
                 "error": str(e),
             }
 
-    def generate_answer_stream(
+    async def generate_answer_stream(
         self,
         query: str,
         user_id: str,
         top_k: int = 3,
-    ) -> Generator[str, None, None]:
+    ) -> AsyncIterator[bytes]:
         """
         RAG pipeline with streaming: retrieve chunks, stream OpenAI response.
-        Yields Server-Sent Event formatted messages.
+        Yields Server-Sent Event formatted messages. Blocking retrieval runs
+        in worker threads; the OpenAI stream is consumed on the event loop.
         """
+        if not self.has_index(user_id):
+            yield _sse_event({"type": "error", "content": "No documents found in your Knowledge Vault"})
+            return
+
         # Retrieve relevant document chunks
-        chunks = self.query_documents(query, user_id, top_k)
+        query_embedding, store = await asyncio.gather(
+            asyncio.to_thread(self.embed_query, query),
+            asyncio.to_thread(self._load_or_create_index, user_id),
+        )
+        chunks = await asyncio.to_thread(self.search_index, store, query_embedding, top_k)
 
         if not chunks:
-            yield f"data: {json.dumps({'type': 'error', 'content': 'No documents found in your Knowledge Vault'})}\n\n"
+            yield _sse_event({"type": "error", "content": "No documents found in your Knowledge Vault"})
             return
 
         # Build context and citations
-        context_parts = []
-        citations = []
-        seen_docs = set()
-
-        for idx, chunk in enumerate(chunks, 1):
-            context_parts.append(f"[Source {idx}] {chunk['text']}")
-            doc_key = (chunk["document_id"], chunk["title"])
-            if doc_key not in seen_docs:
-                citations.append({
-                    "title": chunk["title"],
-                    "document_id": chunk["document_id"],
-                })
-                seen_docs.add(doc_key)
+        context, citations = self._build_context(chunks)
 
         # Send citations first
-        yield f"data: {json.dumps({'type': 'citations', 'content': citations})}\n\n"
-
-        context = "\n\n".join(context_parts)
+        yield _sse_event({"type": "citations", "content": citations})
+
+        cache_key = chunk_set_key(user_id, chunks)
+        # Waits on the cache lock, which an insert in a worker thread may hold
+        cached_answer = await asyncio.to_thread(self.answer_cache.get, query_embedding, cache_key)
+        if cached_answer is not None:
+            yield _TOKEN_EVENT_PREFIX + orjson.dumps(cached_answer) + _TOKEN_EVENT_SUFFIX
+            yield _DONE_EVENT
+            return
 
         # Stream answer from OpenAI
-        client = openai.OpenAI(api_key=settings.openai_api_key)
         system_prompt = """You are a helpful travel assistant. Answer the user's question based on the provided context from their uploaded documents.
 
 IMPORTANT:
@@ -305,7 +618,7 @@ User's question: {query}
 Answer the question based on the context above. Include [Source N] citations."""
 
         try:
-            stream = client.chat.completions.create(
+            stream = await self.async_openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -316,13 +629,20 @@ Answer the question based on the context above. Include [Source N] citations."""
                 stream=True,
             )
 
-            for chunk in stream:
+            answer_parts = []
+            async for chunk in stream:
                 if chunk.choices[0].delta.content:
                     content = chunk.choices[0].delta.content
-                    yield f"data: {json.dumps({'type': 'token', 'content': content})}\n\n"
+                    answer_parts.append(content)
+                    yield _TOKEN_EVENT_PREFIX + orjson.dumps(content) + _TOKEN_EVENT_SUFFIX
+
+            # Persisting the cache writes files; keep it off the event loop
+            await asyncio.to_thread(
+                self.answer_cache.put, query_embedding, cache_key, "".join(answer_parts)
+            )
 
             # Signal completion
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield _DONE_EVENT
 
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+            yield _sse_event({"type": "error", "content": str(e)})